@@ -4,39 +4,108 @@ Board Panel: Visual game board with player movement and property ownership
 AI Panel: Player statistics, AI decision insights, game metrics
 """
 
+import time
+
+# Reference point for the time-to-first-frame figure
+STARTUP_TIME = time.perf_counter()
+
 import pygame
 import sys
+import os
+import json
 import threading
-import time
 import random
 import math
 from board_config import (
     BOARD_LAYOUT, PROPERTY_COLORS, PROPERTY_INFO, CORNERS,
     BOARD_WIDTH, BOARD_HEIGHT, CORNER_SIZE, PROPERTY_WIDTH, PROPERTY_HEIGHT,
+    BOARD_GEOMETRY, compute_board_geometry,
     COLOR_BACKGROUND, COLOR_CENTER, COLOR_BORDER, COLOR_TEXT,
     COLOR_PLAYER_1, COLOR_PLAYER_2, COLOR_OWNED_BORDER,
     COLOR_PANEL_BG, COLOR_LOG_BG, COLOR_LOG_TEXT,
     FONT_SIZE_TITLE, FONT_SIZE_LARGE, FONT_SIZE_MEDIUM, FONT_SIZE_SMALL, FONT_SIZE_TINY
 )
 
-# Import game modules
+# Import game modules (the search engine itself - node/tree - is imported
+# when the first game starts, see GameUI.start_game)
 try:
-    from property import properties
+    from property import properties, assign_random_taxes
     from player import Player
-    from node import Node
-    import tree
 except ImportError as e:
     print(f"Error importing game modules: {e}")
     print("Make sure you're running from the correct directory with all game files present.")
     sys.exit(1)
 
-# Initialize Pygame
-try:
-    pygame.init()
-except Exception as e:
-    print(f"Failed to initialize Pygame: {e}")
-    print("Please install pygame: pip install pygame")
-    sys.exit(1)
+# Search engine modules, imported when the first game starts
+tree = None
+Node = None
+OpeningBook = None
+EvalCache = None
+
+
+def load_engine():
+    """Import the search engine on first use, off the time-to-first-frame path"""
+    global tree, Node, OpeningBook, EvalCache
+    if tree is None:
+        import tree as tree_module
+        from node import Node as node_class
+        from opening_book import OpeningBook as book_class
+        from eval_cache import EvalCache as cache_class
+        tree, Node, OpeningBook, EvalCache = tree_module, node_class, book_class, cache_class
+
+
+# Resolved font file paths, so later starts skip the system font scan
+FONT_CACHE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".font_cache.json")
+
+
+class FontCache:
+    """Creates fonts on first use from a font file resolved once and cached on disk"""
+    
+    def __init__(self, name='Arial', cache_file=FONT_CACHE_FILE):
+        self.name = name
+        self.cache_file = cache_file
+        self._paths = None
+        self._fonts = {}
+    
+    def _load_paths(self):
+        try:
+            with open(self.cache_file) as f:
+                paths = json.load(f).get(self.name)
+            # Re-resolve if a cached font file has been removed
+            if paths is not None and all(p is None or os.path.exists(p) for p in paths.values()):
+                return paths
+        except (OSError, ValueError):
+            pass
+        
+        # pygame.font.match_font scans the system fonts - only done on a cache miss
+        paths = {
+            'regular': pygame.font.match_font(self.name),
+            'bold': pygame.font.match_font(self.name, bold=True),
+        }
+        try:
+            with open(self.cache_file, 'w') as f:
+                json.dump({self.name: paths}, f)
+        except OSError:
+            pass
+        return paths
+    
+    def get(self, size, bold=False):
+        """Font of the given size, falling back to pygame's default font"""
+        key = (size, bold)
+        if key not in self._fonts:
+            if self._paths is None:
+                self._paths = self._load_paths()
+            path = self._paths['bold' if bold else 'regular']
+            try:
+                font = pygame.font.Font(path, size)
+            except (OSError, RuntimeError):
+                font = pygame.font.Font(None, size)
+            # No separate bold face: let pygame embolden the regular one
+            if bold and path == self._paths['regular']:
+                font.set_bold(True)
+            self._fonts[key] = font
+        return self._fonts[key]
+
 
 class BoardRenderer:
     """Handles all board rendering and layout calculations"""
@@ -48,86 +117,20 @@ class BoardRenderer:
         self.property_width = PROPERTY_WIDTH
         self.property_height = PROPERTY_HEIGHT
         
-        # Precompute all 40 board positions
+        # All 40 board positions, precomputed in board_config for the default size
         self.positions = self._compute_board_positions()
     
     def _compute_board_positions(self):
         """Compute pixel coordinates for all 40 board spaces"""
-        positions = {}
-        corner = self.corner_size
-        pw = self.property_width
-        ph = self.property_height
-        
-        # Bottom row: positions 0-10 (GO to JAIL, right to left)
-        # Position 0: GO corner (bottom-right)
-        positions[0] = {
-            'rect': pygame.Rect(self.width - corner, self.height - corner, corner, corner),
-            'angle': 0,
-            'type': 'corner'
-        }
-        
-        # Positions 1-9: Properties on bottom (right to left)
-        # Use corner depth for vertical size so tiles do not overlap corners
-        for i in range(1, 10):
-            x = self.width - corner - (i * pw)
-            positions[i] = {
-                'rect': pygame.Rect(int(x), self.height - corner, int(pw), int(corner)),
-                'angle': 0,
-                'type': 'property'
-            }
-        
-        # Position 10: JAIL corner (bottom-left)
-        positions[10] = {
-            'rect': pygame.Rect(0, self.height - corner, corner, corner),
-            'angle': 0,
-            'type': 'corner'
-        }
-        
-        # Left side: positions 11-19 (bottom to top)
-        # Use corner depth for horizontal size so tiles do not overlap corners
-        for i in range(1, 10):
-            y = self.height - corner - (i * ph)
-            positions[10 + i] = {
-                'rect': pygame.Rect(0, int(y), int(corner), int(ph)),
-                'angle': 90,
-                'type': 'property'
-            }
-        
-        # Position 20: FREE PARKING corner (top-left)
-        positions[20] = {
-            'rect': pygame.Rect(0, 0, corner, corner),
-            'angle': 0,
-            'type': 'corner'
-        }
-        
-        # Top row: positions 21-29 (left to right)
-        # Use corner depth for vertical size to align with corners
-        for i in range(1, 10):
-            x = corner + ((i - 1) * pw)
-            positions[20 + i] = {
-                'rect': pygame.Rect(int(x), 0, int(pw), int(corner)),
-                'angle': 0,
-                'type': 'property'
-            }
-        
-        # Position 30: GO TO JAIL corner (top-right)
-        positions[30] = {
-            'rect': pygame.Rect(self.width - corner, 0, corner, corner),
-            'angle': 0,
-            'type': 'corner'
+        if (self.width, self.height) == (BOARD_WIDTH, BOARD_HEIGHT):
+            geometry = BOARD_GEOMETRY
+        else:
+            geometry = compute_board_geometry(self.width, self.height, self.corner_size,
+                                              self.property_width, self.property_height)
+        return {
+            index: {'rect': pygame.Rect(rect), 'angle': angle, 'type': space_type}
+            for index, (rect, angle, space_type) in geometry.items()
         }
-        
-        # Right side: positions 31-39 (top to bottom)
-        # Use corner depth for horizontal size to align with corners
-        for i in range(1, 10):
-            y = corner + ((i - 1) * ph)
-            positions[30 + i] = {
-                'rect': pygame.Rect(self.width - corner, int(y), int(corner), int(ph)),
-                'angle': 270,
-                'type': 'property'
-            }
-        
-        return positions
     
     def get_position(self, board_index):
         """Get pixel rect for a given board position (0-39)"""
@@ -150,26 +153,18 @@ class GameUI:
         self.window_height = self.board_height
         
         try:
+            # Only the subsystems the viewer uses; pygame.init() would also
+            # start audio and joystick support
+            pygame.display.init()
+            pygame.font.init()
             self.screen = pygame.display.set_mode((self.window_width, self.window_height))
             pygame.display.set_caption("AI Monopoly Game - Board vs AI Insights")
         except Exception as e:
             print(f"Failed to initialize Pygame display: {e}")
             raise
         
-        # Fonts - use system fonts for better readability
-        try:
-            self.font_title = pygame.font.SysFont('Arial', FONT_SIZE_TITLE, bold=True)
-            self.font_large = pygame.font.SysFont('Arial', FONT_SIZE_LARGE, bold=True)
-            self.font_medium = pygame.font.SysFont('Arial', FONT_SIZE_MEDIUM, bold=False)
-            self.font_small = pygame.font.SysFont('Arial', FONT_SIZE_SMALL, bold=False)
-            self.font_tiny = pygame.font.SysFont('Arial', FONT_SIZE_TINY, bold=False)
-        except:
-            # Fallback to default font
-            self.font_title = pygame.font.Font(None, FONT_SIZE_TITLE)
-            self.font_large = pygame.font.Font(None, FONT_SIZE_LARGE)
-            self.font_medium = pygame.font.Font(None, FONT_SIZE_MEDIUM)
-            self.font_small = pygame.font.Font(None, FONT_SIZE_SMALL)
-            self.font_tiny = pygame.font.Font(None, FONT_SIZE_TINY)
+        # Fonts - system Arial for better readability, resolved lazily
+        self.fonts = FontCache('Arial')
         
         # Board renderer
         self.board_renderer = BoardRenderer(self.board_width, self.board_height)
@@ -181,6 +176,11 @@ class GameUI:
         self.game_speed = 1.0  # seconds between moves
         self.paused = False
         
+        # Turbo mode: no per-move sleep, the UI samples the state at a fixed rate
+        self.turbo = False
+        self.turbo_refresh_hz = 10
+        self.last_render_time = 0.0
+        
         # Animation state
         self.player_animations = {}  # {player_id: {'start_pos': int, 'end_pos': int, 'progress': 0.0}}
         self.last_positions = {0: 0, 1: 0}  # Track previous positions for animation
@@ -189,11 +189,14 @@ class GameUI:
         self.game_log = []
         self.max_log_lines = 200  # Keep more history
         self.log_scroll_offset = 0  # For scrolling
+        self.pending_log = []  # Lines from the game thread, appended in batches by the UI
+        self.log_lock = threading.Lock()
         
         # Control buttons
         self.start_button_rect = None
         self.pause_button_rect = None
         self.reset_button_rect = None
+        self.turbo_button_rect = None
         self.speed_slider_rect = None
         self.speed_slider_handle = None
         self.dragging_slider = False
@@ -201,6 +204,8 @@ class GameUI:
         # Debug info tracking
         self.last_balances = {0: 1500, 1: 1500}
         self.last_utility_scores = {0: 0, 1: 0}
+        # tree.SearchResult of the last search; its pv_moves seed the next one's move order
+        self.search_result = None
         
         # Clock for FPS control
         self.clock = pygame.time.Clock()
@@ -208,11 +213,37 @@ class GameUI:
         
         # Game thread
         self.game_thread = None
+        self.opening_book = None  # memory-mapped when the first game starts
+        self.eval_cache = None
+        
+        # Cancellation: one token per game, plus a child token for the
+        # search currently in flight so pausing can interrupt it
+        self.game_token = None
+        self.active_search_token = None
         
         # Lock for thread-safe updates
-        import threading
         self.update_lock = threading.Lock()
     
+    @property
+    def font_title(self):
+        return self.fonts.get(FONT_SIZE_TITLE, bold=True)
+    
+    @property
+    def font_large(self):
+        return self.fonts.get(FONT_SIZE_LARGE, bold=True)
+    
+    @property
+    def font_medium(self):
+        return self.fonts.get(FONT_SIZE_MEDIUM)
+    
+    @property
+    def font_small(self):
+        return self.fonts.get(FONT_SIZE_SMALL)
+    
+    @property
+    def font_tiny(self):
+        return self.fonts.get(FONT_SIZE_TINY)
+    
     def render_board(self):
         """Render the game board"""
         # Clear board area with background color
@@ -494,9 +525,22 @@ class GameUI:
         text_rect = reset_text.get_rect(center=self.reset_button_rect.center)
         self.screen.blit(reset_text, text_rect)
         
+        # TURBO button
+        turbo_x = reset_x + button_width + margin
+        self.turbo_button_rect = pygame.Rect(turbo_x, y_offset, button_width, button_height)
+        if self.turbo:
+            pygame.draw.rect(self.screen, (148, 0, 211), self.turbo_button_rect)  # Purple
+        else:
+            pygame.draw.rect(self.screen, (120, 120, 160), self.turbo_button_rect)  # Slate
+        turbo_text = self.font_tiny.render("TURBO", True, (255, 255, 255))
+        pygame.draw.rect(self.screen, COLOR_BORDER, self.turbo_button_rect, 2)
+        text_rect = turbo_text.get_rect(center=self.turbo_button_rect.center)
+        self.screen.blit(turbo_text, text_rect)
+        
         # Speed slider
         slider_y = y_offset + button_height + 15
-        slider_label = self.font_small.render(f"Speed: {self.game_speed:.1f}s", True, COLOR_LOG_TEXT)
+        speed_label = "Speed: TURBO" if self.turbo else f"Speed: {self.game_speed:.1f}s"
+        slider_label = self.font_small.render(speed_label, True, COLOR_LOG_TEXT)
         self.screen.blit(slider_label, (panel_x + 15, slider_y))
         
         slider_y += 20
@@ -634,13 +678,34 @@ class GameUI:
             pygame.draw.rect(self.screen, (70, 70, 70), handle_rect, 1)
     
     def add_game_log(self, message):
-        """Add a message to the game log"""
-        self.game_log.append(message)
+        """Queue a message for the game log (appended by the UI on its next frame)"""
+        with self.log_lock:
+            self.pending_log.append(message)
+            if len(self.pending_log) > self.max_log_lines:
+                del self.pending_log[:-self.max_log_lines]
+    
+    def _flush_game_log(self):
+        """Append queued log lines in one batch"""
+        with self.log_lock:
+            if not self.pending_log:
+                return
+            lines = self.pending_log
+            self.pending_log = []
+        self.game_log.extend(lines)
         if len(self.game_log) > self.max_log_lines:
-            self.game_log.pop(0)
+            del self.game_log[:-self.max_log_lines]
+    
+    def _clear_game_log(self):
+        """Drop all log lines, including ones not yet flushed"""
+        with self.log_lock:
+            self.pending_log = []
+        self.game_log = []
+        self.log_scroll_offset = 0
     
     def render(self):
         """Render entire UI"""
+        self._flush_game_log()
+        self.last_render_time = time.monotonic()
         self.render_board()
         self.render_ai_panel()
         pygame.display.flip()
@@ -652,9 +717,11 @@ class GameUI:
                 return False
             elif event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_SPACE:
-                    self.paused = not self.paused
+                    self.toggle_pause()
                 elif event.key == pygame.K_ESCAPE:
                     return False
+                elif event.key == pygame.K_t:
+                    self.turbo = not self.turbo
                 elif event.key == pygame.K_UP:
                     self.log_scroll_offset = max(0, self.log_scroll_offset - 1)
                 elif event.key == pygame.K_DOWN:
@@ -681,9 +748,11 @@ class GameUI:
                 self.start_game()
         elif self.pause_button_rect and self.pause_button_rect.collidepoint(pos):
             if self.game_running:
-                self.paused = not self.paused
+                self.toggle_pause()
         elif self.reset_button_rect and self.reset_button_rect.collidepoint(pos):
             self.reset_game()
+        elif self.turbo_button_rect and self.turbo_button_rect.collidepoint(pos):
+            self.turbo = not self.turbo
         elif self.speed_slider_handle and self.speed_slider_handle.collidepoint(pos):
             self.dragging_slider = True
     
@@ -694,12 +763,24 @@ class GameUI:
             relative_x = (x - self.speed_slider_rect.left) / self.speed_slider_rect.width
             self.game_speed = 0.2 + (relative_x * 2.8)  # 0.2 to 3.0 seconds
     
+    def toggle_pause(self):
+        """Pause or resume; pausing interrupts the search in flight"""
+        self.paused = not self.paused
+        if self.paused and self.active_search_token is not None:
+            self.active_search_token.cancel()
+    
     def start_game(self):
         """Start the AI game in a separate thread"""
         if not self.game_running:
+            load_engine()
+            # Stored values are only valid for the stock evaluation weights
+            if self.opening_book is None and Node.default_evaluation():
+                self.opening_book = OpeningBook.load()
+            if self.eval_cache is None and Node.default_evaluation():
+                self.eval_cache = EvalCache.open()
+            assign_random_taxes(properties)
             self.game_running = True
-            self.game_log = []  # Clear log
-            self.log_scroll_offset = 0
+            self._clear_game_log()
             self.add_game_log("=" * 30)
             self.add_game_log("🎮 AI MONOPOLY GAME STARTED")
             self.add_game_log("=" * 30)
@@ -709,30 +790,74 @@ class GameUI:
             self.players[1].position = 0
             self.last_balances = {0: 1500, 1: 1500}
             self.last_utility_scores = {0: 0, 1: 0}
+            self.search_result = None
             self.current_node = Node(properties, self.players[0], self.players[1], "non-chance", None)
             
             # Start game thread
-            self.game_thread = threading.Thread(target=self._run_game_loop, daemon=True)
+            self.game_token = tree.CancellationToken()
+            self.game_thread = threading.Thread(target=self._run_game_loop, args=(self.game_token,), daemon=True)
             self.game_thread.start()
     
-    def _run_game_loop(self):
+    def _search(self, intelligence_level, game_token):
+        """Search from the current node; returns False if the search was interrupted"""
+        search_token = tree.CancellationToken(parent=game_token)
+        self.active_search_token = search_token
+        pv = self.search_result.pv_moves if self.search_result is not None else None
+        try:
+            mono_tree = tree.MonopolyTree(self.current_node, cancel_token=search_token,
+                                          book=self.opening_book, cache=self.eval_cache, pv=pv)
+            finished = mono_tree.search(intelligence_level)
+        finally:
+            with self.update_lock:
+                # After a reset, the new game's search may be the active one
+                if self.active_search_token is search_token:
+                    self.active_search_token = None
+        
+        with self.update_lock:
+            # A reset cancels the game token under this lock; from then on the
+            # game state belongs to the new game
+            if game_token.cancelled:
+                return False
+            if finished:
+                self.search_result = mono_tree.result
+            else:
+                # Paused mid-search: drop the partial expansion so the node is
+                # searched again in full once the game resumes
+                self.current_node.action = []
+                self.current_node.children = []
+        return finished
+    
+    def _wait(self, game_token):
+        """Sleep for game_speed, waking early on pause, reset or a speed change"""
+        start = time.monotonic()
+        while not game_token.cancelled and not self.paused and not self.turbo:
+            remaining = self.game_speed - (time.monotonic() - start)
+            if remaining <= 0:
+                break
+            time.sleep(min(remaining, 0.02))
+    
+    def _run_game_loop(self, game_token):
         """Main game loop running in separate thread"""
         try:
-            mono_tree = tree.MonopolyTree(self.current_node)
             intelligence_level = 3
-            mono_tree.generate_tree(intelligence_level)
-            Node.Eval(mono_tree)
             
             move_count = 0
             max_moves = 1000
             
-            while move_count < max_moves and self.game_running:
+            while move_count < max_moves and not game_token.cancelled:
                 if self.paused:
-                    time.sleep(0.1)
+                    time.sleep(0.02)
                     continue
                 
+                # Generate tree if needed
+                if len(self.current_node.action) == 0:
+                    if not self._search(intelligence_level, game_token):
+                        continue
+                
                 # Check win conditions
                 with self.update_lock:
+                    if game_token.cancelled:
+                        break
                     if self.current_node.current_player.balance > 2000 or self.current_node.second_player.balance < 0:
                         player_id = self.current_node.current_player.ID
                         self.add_game_log("=" * 30)
@@ -746,32 +871,32 @@ class GameUI:
                         self.add_game_log("=" * 30)
                         break
                 
-                # Generate tree if needed
-                if len(self.current_node.action) == 0:
-                    mono_tree = tree.MonopolyTree(self.current_node)
-                    mono_tree.generate_tree(intelligence_level)
-                    Node.Eval(mono_tree)
-                
                 # Process turn
                 if self.current_node.node_type == "chance":
                     # Dice roll
-                    dice = random.randint(1, 6)
+                    first, second = random.randint(1, 6), random.randint(1, 6)
+                    dice = (first + second, first == second)
                     player_id = self.current_node.current_player.ID
-                    self.add_game_log(f"🎲 P{player_id + 1} rolled {dice}")
                     
                     with self.update_lock:
-                        self.current_node = self.current_node.action[dice - 1][1]
+                        if game_token.cancelled:
+                            break
+                        self.add_game_log(f"🎲 P{player_id + 1} rolled {first}+{second}"
+                                          f"{' (doubles)' if first == second else ''}")
+                        self.current_node = self.current_node.child_for_roll(dice)
                     
                 else:
                     # AI decision
                     with self.update_lock:
-                        if self.current_node.current_player.ID == 0:
-                            self.current_node.action.sort(key=lambda x: x[1].zero_value, reverse=True)
-                        else:
-                            self.current_node.action.sort(key=lambda x: x[1].one_value, reverse=True)
-                        
-                        best_action = self.current_node.action[0]
-                        action_name = best_action[0]
+                        if game_token.cancelled:
+                            break
+                        # The search recorded the best action; decisions it
+                        # was started from also have their margins and line
+                        action_name = self.current_node.best_action
+                        best_child = self.current_node.best_child()
+                        result = self.search_result
+                        if result is not None and result.root is not self.current_node:
+                            result = None
                         player_id = self.current_node.current_player.ID
                         old_balance = self.current_node.current_player.balance
                         pos_idx = self.current_node.current_player.position % 40
@@ -780,7 +905,7 @@ class GameUI:
                         # Get utility scores before move
                         old_utility = self.current_node.zero_value if player_id == 0 else self.current_node.one_value
                         
-                        self.current_node = best_action[1]
+                        self.current_node = best_child
                         
                         # Calculate changes
                         new_balance = self.current_node.current_player.balance
@@ -802,9 +927,17 @@ class GameUI:
                         
                         # Debug: utility score
                         self.add_game_log(f"  └─ Utility: {new_utility:.0f} (Δ{new_utility - old_utility:.0f})")
+                        if result is not None and len(result.action_values) > 1:
+                            margins = ", ".join(f"{action.replace('_', ' ')} {margin:+.0f}"
+                                                for action, margin in result.margins()[1:3])
+                            self.add_game_log(f"  └─ Margins: {margins}")
+                        if result is not None and result.principal_variation:
+                            self.add_game_log(f"  └─ Line: {result.line_text()}")
                 
                 # Update player object references while preserving fixed ordering by ID
                 with self.update_lock:
+                    if game_token.cancelled:
+                        break
                     # Map players by ID from the node so UI ordering is stable
                     node_p0 = None
                     node_p1 = None
@@ -832,7 +965,7 @@ class GameUI:
                     self.last_balances[1] = self.players[1].balance
                 
                 move_count += 1
-                time.sleep(self.game_speed)
+                self._wait(game_token)
             
             if move_count >= max_moves:
                 self.add_game_log("⏱️ Max moves reached")
@@ -843,13 +976,20 @@ class GameUI:
             print(f"Game error: {e}")
             traceback.print_exc()
         finally:
-            self.game_running = False
+            # A cancelled game has already been handed over by reset_game
+            if not game_token.cancelled:
+                self.game_running = False
     
     def reset_game(self):
         """Reset the game"""
-        self.game_running = False
+        load_engine()
+        with self.update_lock:
+            if self.game_token is not None:
+                self.game_token.cancel()
+            self.game_running = False
         if self.game_thread:
             self.game_thread.join(timeout=1)
+        self.paused = False
         
         # Reinitialize players with fresh state
         self.players = [Player(0, balance=1500, position=0), Player(1, balance=1500, position=0)]
@@ -865,12 +1005,12 @@ class GameUI:
         
         # Create fresh game node
         self.current_node = Node(properties, self.players[0], self.players[1], "non-chance", None)
-        self.game_log = []
-        self.log_scroll_offset = 0
+        self._clear_game_log()
         
         # Initialize balance tracking
         self.last_balances = {0: self.players[0].balance, 1: self.players[1].balance}
         self.last_utility_scores = {0: 0.0, 1: 0.0}
+        self.search_result = None
         
         self.add_game_log("🔄 Game reset")
         self.add_game_log("Press START to begin")
@@ -878,14 +1018,23 @@ class GameUI:
     def run(self):
         """Main game loop"""
         running = True
+        self.render()
+        first_frame_ms = (time.perf_counter() - STARTUP_TIME) * 1000
+        print(f"Startup: first frame after {first_frame_ms:.0f} ms")
         self.start_game()
+        self.add_game_log(f"⚡ First frame after {first_frame_ms:.0f} ms")
         
         while running:
             running = self.handle_events()
-            self.render()
+            # In turbo mode the game thread outpaces the display, so only
+            # sample its latest state at a fixed refresh rate
+            if not self.turbo or time.monotonic() - self.last_render_time >= 1.0 / self.turbo_refresh_hz:
+                self.render()
             self.clock.tick(self.fps)
         
         self.game_running = False
+        if self.game_token is not None:
+            self.game_token.cancel()
         pygame.quit()
         sys.exit()
 
@@ -0,0 +1,469 @@
+"""
+Zero-sum expectiminimax with alpha-beta cutoffs.
+
+Node.Eval backs up independent zero_value/one_value scores, so nothing can be
+pruned. In zero-sum mode a position is worth a single number - player 0's
+advantage, Node.zero_sum_utility() - which player 0 maximises and player 1
+minimises. That allows alpha-beta cutoffs at decision nodes, with Star1
+windows carried through chance nodes using bounds on the subtree values.
+
+The search is depth-first and iteratively deepened: each iteration stores the
+best action per state in a transposition table that orders moves for the
+next, deeper one. Only the root's children are kept; everything below is
+discarded as soon as it has been searched, so the principal variation in
+self.result is read back from the table.
+
+Compare node counts against the unpruned search with:
+    python alphabeta.py --depth 6
+"""
+
+import argparse
+import collections
+import functools
+import random
+import time
+
+import landing
+import tree
+from node import DICE_OUTCOMES, Node, UTILITY_WEIGHTS, roll_outcome, search_terminal
+from player import Player
+from property import GROUP_MASKS
+
+INF = float('inf')
+
+# Transposition table entry flags
+EXACT, LOWER, UPPER = 0, 1, 2
+# Entries a table kept across moves may hold before it is started afresh;
+# most belong to positions the game has already left behind
+MAX_TABLE_ENTRIES = 200_000
+
+# What one ply can do to a player's balance, and to their utility while the
+# balance stays above the low-balance threshold:
+#   own decision:      buy up to $400 of property, sell it for 90%, pay up
+#                      to $200 tax or $40 rent
+#   own roll:          -$200 (Chance) to +$400 (passing GO onto Community Chest)
+#   opponent decision: receive up to $40 rent
+#   opponent roll:     pay $50 to the opponent (Chance)
+# Whole color groups double rents, earn Node.utility's monopoly bonus and
+# allow houses, which lift rents far beyond $40, so positions where a player
+# may hold a whole group within the horizon, by buying or trading, get no
+# bounds at all (see _monopoly_possible). Trades only happen then too. A
+# player can only buy the street they stand on, so only streets they can
+# reach in the rolls before one of their decisions count as buyable.
+OWN_DECISION, OWN_ROLL, OPPONENT_DECISION, OPPONENT_ROLL = range(4)
+MAX_PRICE = 400
+
+
+def _ply_ranges():
+    """{ply kind: ((balance drop, gain), (utility drop, gain))} for the current UTILITY_WEIGHTS"""
+    # A property adds value + rent_multiplier * rent (rent is 10% of value)
+    # to the utility, so buying for $v changes it by rent_multiplier * 0.1 * v
+    # and selling for 90% by -(0.1 + rent_multiplier * 0.1) * v
+    rent_weight = 0.1 * UTILITY_WEIGHTS["rent_multiplier"]
+    return {
+        OWN_DECISION: ((-MAX_PRICE, 0.9 * MAX_PRICE),
+                       (min(-200, -(0.1 + rent_weight) * MAX_PRICE), rent_weight * MAX_PRICE)),
+        OWN_ROLL: ((-200, 400), (-200, 400)),
+        OPPONENT_DECISION: ((0, 40), (0, 40)),
+        OPPONENT_ROLL: ((-50, 0), (-50, 0)),
+    }
+
+
+class SearchCancelled(Exception):
+    """Raised inside the search when the cancel token fires"""
+
+
+def _balance_score_range(low, high):
+    # The balance part of Node.utility: low_balance_factor * balance below
+    # low_balance, the balance itself above; increasing on each side of it
+    threshold, factor = UTILITY_WEIGHTS["low_balance"], UTILITY_WEIGHTS["low_balance_factor"]
+
+    def score(balance):
+        return balance if balance >= threshold else factor * balance
+    if high < threshold or low >= threshold:
+        return score(low), score(high)
+    return min(score(low), threshold), max(factor * threshold, high)
+
+
+def _rent_flow_change():
+    # Largest change of the optional rent-flow term of Node.utility from
+    # buying or selling one property (rent is at most $40)
+    if not Node.rent_flow_turns:
+        return 0
+    return Node.rent_flow_turns * max(landing.landing_probabilities()) * 40
+
+
+def _utility_range(player, plies):
+    """(lower, upper) bound on `player`'s Node.utility score after `plies`,
+    a {ply kind: count} of the plies to come"""
+    ranges = _ply_ranges()
+    balance_low = balance_high = player.balance
+    utility_low = utility_high = 0
+    for kind, count in plies.items():
+        (balance_drop, balance_gain), (utility_drop, utility_gain) = ranges[kind]
+        balance_low += balance_drop * count
+        balance_high += balance_gain * count
+        utility_low += utility_drop * count
+        utility_high += utility_gain * count
+    property_score = sum(prop.value + UTILITY_WEIGHTS["rent_multiplier"] * prop.rent
+                         for prop in player.properties)
+    decisions = plies.get(OWN_DECISION, 0)
+    rent_flow_change = _rent_flow_change() * decisions
+    if Node.rent_flow_turns:
+        property_score += Node.rent_flow_turns * landing.expected_rent_flow(player)
+    if balance_low >= UTILITY_WEIGHTS["low_balance"]:
+        score = property_score + player.balance
+        return score + utility_low - rent_flow_change, score + utility_high + rent_flow_change
+    # The balance may cross the threshold: bound the two parts separately
+    low, high = _balance_score_range(balance_low, balance_high)
+    # Buying or selling moves the property part by at most value + rent score
+    property_change = (1 + 0.1 * UTILITY_WEIGHTS["rent_multiplier"]) * MAX_PRICE * decisions + rent_flow_change
+    return property_score - property_change + low, property_score + property_change + high
+
+
+@functools.lru_cache(maxsize=None)
+def _reachable(position, rolls):
+    """Bitmask of the squares a player on `position` may stand on after
+    `rolls` rolls (a superset: rolls out of jail are taken as free moves)"""
+    if rolls == 0:
+        return 1 << position
+    mask = 0
+    for start in range(40):
+        if _reachable(position, rolls - 1) >> start & 1:
+            walker = Player(0, 1500, start)
+            for roll, _ in DICE_OUTCOMES:
+                mask |= 1 << roll_outcome(walker, roll)[0]
+    return mask
+
+
+def _monopoly_possible(players, decisions, buyable):
+    """True if one of `players` owns a whole color group, or could after
+    their `decisions` ({player ID: decisions to come}), buying only streets
+    in `buyable` ({player ID: bitmask of squares they decide on})"""
+    owned = 0
+    for player in players:
+        owned |= player.owned_mask
+    total = sum(decisions.values())
+    anyone = 0
+    for mask in buyable.values():
+        anyone |= mask
+    for group_mask in GROUP_MASKS.values():
+        # Each decision buys at most one street
+        unowned = group_mask & ~owned
+        missing = bin(unowned).count("1")
+        for player in players:
+            if (player.owned_mask & group_mask == owned & group_mask and missing <= decisions[player.ID]
+                    and unowned & ~buyable[player.ID] == 0):
+                return True
+        # Or the missing streets are bought by either player and one trade
+        # (Node.trade_actions) hands a whole group to one of them
+        if missing + 1 <= total and unowned & ~anyone == 0:
+            return True
+    return False
+
+
+def value_bounds(node, depth):
+    """(lower, upper) bounds on the zero-sum value of `node` searched `depth` plies"""
+    # Plies alternate decision / roll; tally each player's coming plies
+    players = {node.current_player.ID: node.current_player, node.second_player.ID: node.second_player}
+    plies = {player_id: collections.Counter() for player_id in players}
+    # Squares each player may stand on at one of their decisions
+    buyable = {player_id: 0 for player_id in players}
+    mover, other = node.current_player.ID, node.second_player.ID
+    kind = node.node_type
+    for _ in range(depth):
+        if kind == "chance":
+            plies[mover][OWN_ROLL] += 1
+            plies[other][OPPONENT_ROLL] += 1
+            kind = "non-chance"
+        else:
+            buyable[mover] |= _reachable(players[mover].position, plies[mover][OWN_ROLL])
+            plies[mover][OWN_DECISION] += 1
+            plies[other][OPPONENT_DECISION] += 1
+            # After a decision the opponent rolls
+            mover, other = other, mover
+            kind = "chance"
+
+    decisions = {player_id: plies[player_id][OWN_DECISION] for player_id in players}
+    if _monopoly_possible(players.values(), decisions, buyable):
+        return -INF, INF
+    zero_low, zero_high = _utility_range(players[0], plies[0])
+    one_low, one_high = _utility_range(players[1], plies[1])
+    return zero_low - one_high, zero_high - one_low
+
+
+class AlphaBetaSearch:
+    def __init__(self, root_node, cancel_token=None, table=None, pruning=True, order_seed=None, pv=None):
+        self.rootNode = root_node
+        self.cancel_token = cancel_token
+        # state_key -> (depth, flag, value, best action)
+        self.table = {} if table is None else table
+        self.pruning = pruning
+        # Shuffles move order, so parallel searchers explore different lines
+        self.rng = random.Random(order_seed) if order_seed is not None else None
+        # Optional tree.SearchResult.pv_moves of an earlier search, ordering
+        # moves in states the table has no entry for
+        self.pv = {} if pv is None else pv
+        # tree.SearchResult of the last completed iteration
+        self.result = None
+        self.nodes = 0
+        self.completed = True
+        self.depth_reached = 0
+
+    def is_cancelled(self):
+        return self.cancel_token is not None and self.cancel_token.cancelled
+
+    def search(self, depth):
+        """Search to `depth`, deepening one ply at a time.
+
+        The root's children get zero_value = v and one_value = -v, so the
+        game loops can pick a move exactly as they do after Node.Eval. At a
+        decision root the best action's value is exact, but the others are
+        searched against it and only bounded: their values are at most (for
+        the mover) what they are worth. If cancelled, the values of the last
+        completed iteration are kept. Returns False if the search was cancelled.
+        """
+        root = self.rootNode
+        expand_root(root)
+        children = [child for _, child in root.action]
+        if self.rng is not None:
+            self.rng.shuffle(children)
+
+        for iteration_depth in range(1, depth + 1):
+            try:
+                values, best = self._root_values(root, children, iteration_depth - 1)
+            except SearchCancelled:
+                self.completed = False
+                return False
+            set_root_values(root, [values[id(child)] for _, child in root.action], best)
+            self.depth_reached = iteration_depth
+            self.result = self._result(iteration_depth)
+            # The next iteration tries the best action first, so the others
+            # are searched against a good bound from the start
+            if best is not None:
+                best_child = next(child for action, child in root.action if action == best)
+                children.remove(best_child)
+                children.insert(0, best_child)
+        return True
+
+    def _root_values(self, root, children, depth):
+        """({id(child): value}, best action or None at a chance root)"""
+        if root.node_type == "chance":
+            # The expectation needs every outcome's exact value
+            return {id(child): self._value(child, depth, -INF, INF) for child in children}, None
+        maximizing = root.current_player.ID == 0
+        actions = {id(child): action for action, child in root.action}
+        values = {}
+        best_value, best = (-INF if maximizing else INF), None
+        for child in children:
+            # Only whether a child beats the best so far matters
+            if maximizing:
+                value = self._value(child, depth, best_value, INF)
+            else:
+                value = self._value(child, depth, -INF, best_value)
+            values[id(child)] = value
+            if best is None or (value > best_value if maximizing else value < best_value):
+                best_value, best = value, actions[id(child)]
+        return values, best
+
+    def _result(self, depth):
+        """The root's SearchResult, its principal variation followed through the table"""
+        result = tree.SearchResult(self.rootNode)
+        if result.best_action is None:
+            return result
+        node = next(child for action, child in self.rootNode.action if action == result.best_action).detached()
+        for _ in range(depth - 1):
+            if search_terminal(node):
+                break
+            if node.node_type == "chance":
+                action = max(node.roll_groups().items(), key=lambda item: item[1][1])[0]
+            else:
+                entry = self.table.get(node.state_key())
+                if entry is None or entry[3] is None:
+                    break
+                action = entry[3]
+                result.pv_moves[node.state_key()] = action
+            result.principal_variation.append(action)
+            node = node.make_child(action).detached()
+        return result
+
+    def _value(self, node, depth, alpha, beta):
+        self.nodes += 1
+        if self.is_cancelled():
+            raise SearchCancelled()
+
+        # Leaves: depth reached, bankruptcy or someone won
+        if depth == 0 or search_terminal(node):
+            return node.zero_sum_utility()
+
+        key = node.state_key()
+        entry = self.table.get(key)
+        best_action = self.pv.get(key)
+        if entry is not None:
+            entry_depth, flag, value, best_action = entry
+            if self.pruning and entry_depth >= depth:
+                if flag == EXACT:
+                    return value
+                if flag == LOWER and value >= beta:
+                    return value
+                if flag == UPPER and value <= alpha:
+                    return value
+
+        if node.node_type == "chance":
+            value, flag = self._chance_value(node, depth, alpha, beta)
+            best_action = None
+        else:
+            value, flag, best_action = self._decision_value(node, depth, alpha, beta, best_action)
+
+        # Only the root's children are kept
+        node.action = []
+        node.children = []
+
+        self.table[key] = (depth, flag, value, best_action)
+        return value
+
+    def _decision_value(self, node, depth, alpha, beta, best_action):
+        actions = list(node.legal_actions())
+        if self.rng is not None:
+            self.rng.shuffle(actions)
+        # Move ordering: the best action from a shallower iteration goes first
+        if best_action in actions:
+            actions.remove(best_action)
+            actions.insert(0, best_action)
+
+        maximizing = node.current_player.ID == 0
+        original_alpha, original_beta = alpha, beta
+        best_value = -INF if maximizing else INF
+        for action in actions:
+            value = self._value(node.make_child(action), depth - 1, alpha, beta)
+            if (maximizing and value > best_value) or (not maximizing and value < best_value):
+                best_value = value
+                best_action = action
+            if not self.pruning:
+                continue
+            if maximizing:
+                alpha = max(alpha, value)
+            else:
+                beta = min(beta, value)
+            if alpha >= beta:
+                break
+
+        if best_value <= original_alpha:
+            flag = UPPER
+        elif best_value >= original_beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        return best_value, flag, best_action
+
+    def _chance_value(self, node, depth, alpha, beta):
+        # Star1: bound the children's values to derive a window for each
+        # child and to cut off once the expectation is decided
+        if self.pruning:
+            lower, upper = value_bounds(node, depth)
+        else:
+            lower, upper = -INF, INF
+        groups = sorted(node.roll_groups().items(), key=lambda item: -item[1][1])
+
+        expected = 0.0
+        remaining = 1.0
+        for action, (_, probability, _) in groups:
+            remaining -= probability
+            if remaining < 1e-12:
+                remaining = 0.0
+            rest_high = upper * remaining if remaining else 0.0
+            rest_low = lower * remaining if remaining else 0.0
+            child_alpha = max(lower, (alpha - expected - rest_high) / probability)
+            child_beta = min(upper, (beta - expected - rest_low) / probability)
+
+            value = self._value(node.make_child(action), depth - 1, child_alpha, child_beta)
+            expected += probability * value
+
+            if self.pruning:
+                if expected + rest_high <= alpha:
+                    return expected + rest_high, UPPER
+                if expected + rest_low >= beta:
+                    return expected + rest_low, LOWER
+        return expected, EXACT
+
+
+def expand_root(root):
+    """Attach the root's children, if it has none yet"""
+    if len(root.action) == 0:
+        for action in root.legal_actions():
+            root.make_child(action)
+        for _, child in root.action:
+            child.parent = root
+            child.round = root.round + 1
+
+
+def set_root_values(root, values, best_action=None):
+    """Give the root's children (in root.action order) their searched values.
+
+    `best_action`, if given, is the decision root's best action, for when
+    the other actions' values are only bounds that may tie with it.
+    """
+    for (_, child), value in zip(root.action, values):
+        child.zero_value = value
+        child.one_value = -value
+        child.known_value = True
+    children = [child for _, child in root.action]
+    if root.node_type == "chance":
+        value = sum(child.probability * child.zero_value for child in children)
+        root.best_action = max(root.action, key=lambda item: item[1].probability)[0]
+    elif best_action is not None:
+        root.best_action = best_action
+        value = next(child for action, child in root.action if action == best_action).zero_value
+    elif root.current_player.ID == 0:
+        root.best_action, best = max(root.action, key=lambda item: item[1].zero_value)
+        value = best.zero_value
+    else:
+        root.best_action, best = min(root.action, key=lambda item: item[1].zero_value)
+        value = best.zero_value
+    root.zero_value, root.one_value = value, -value
+
+
+def compare(depth, positions=8, seed=3):
+    """Nodes and time of the pruned vs unpruned zero-sum search on sample positions"""
+    import tree
+    from opening_book import start_node
+
+    rng = random.Random(seed)
+    samples = []
+    node = start_node()
+    while len(samples) < positions:
+        tree.MonopolyTree(node).search(1)
+        if node.node_type != "chance" or len(samples) < positions // 2 or rng.random() < 0.5:
+            samples.append(node.detached())
+        node = rng.choice(node.action)[1].detached()
+
+    totals = {True: [0, 0.0], False: [0, 0.0]}
+    for sample in samples:
+        results = {}
+        for pruning in (False, True):
+            search = AlphaBetaSearch(sample.detached(), pruning=pruning)
+            start = time.perf_counter()
+            search.search(depth)
+            totals[pruning][0] += search.nodes
+            totals[pruning][1] += time.perf_counter() - start
+            # Only the best action's value is exact with pruning
+            results[pruning] = (search.rootNode.best_action, round(search.rootNode.zero_value, 6))
+        assert results[True] == results[False], (results[True], results[False])
+
+    for pruning in (False, True):
+        nodes, elapsed = totals[pruning]
+        label = "alpha-beta" if pruning else "no pruning"
+        print(f"{label:10s} depth={depth} nodes={nodes:8d} time={elapsed:6.2f}s")
+    print(f"nodes visited: {totals[True][0] / totals[False][0]:.1%} of the unpruned search")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare zero-sum search with and without pruning")
+    parser.add_argument("--depth", type=int, default=5)
+    parser.add_argument("--positions", type=int, default=8)
+    args = parser.parse_args()
+    compare(args.depth, args.positions)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,266 @@
+"""
+Array-backed (struct-of-arrays) game tree for large searches.
+
+MonopolyTree keeps every node as a Node object with its own lists and deep
+copies of both players and all 28 properties, which at depth 5-6 means
+millions of heap objects. ArrayTree instead stores the tree as parallel
+`array` columns - parent, node type, mover, action code, probability, first
+child, child count, values - plus one fixed-size packed state record per
+node. Nodes are laid out breadth-first, so the children of a node are
+contiguous and always come after it; backup is then a single reverse sweep
+over the columns.
+
+Node objects are only created transiently, to expand a node or score a
+leaf with Node.utility, and for the root's children once the search is done.
+Game(players, store="array") searches with it; the opening book, cache and
+the optional search extensions only work with MonopolyTree.
+
+Compare against MonopolyTree with:
+    python array_tree.py --depth 6
+"""
+
+import argparse
+import struct
+import time
+import tracemalloc
+from array import array
+
+import tree
+from node import Node, ACTION_CODES, ACTION_NAMES, DICE_OUTCOMES, search_terminal
+from player import Player
+from property import Property, PROPERTY_DEFINITIONS
+
+CHANCE = 1
+DECISION = 0
+
+# Bit of each roll in the action codes of chance children
+_ROLL_BITS = {roll: 1 << index for index, (roll, _) in enumerate(DICE_OUTCOMES)}
+
+# Packed state: two players (ID, position, balance, in_jail, jail_turns),
+# the positions each player holds as a bitmask, and the board owner and
+# house count bytes
+_PLAYER = 'bbd?b'
+_BOARD = f'{len(PROPERTY_DEFINITIONS)}s'
+STATE = struct.Struct('<' + _PLAYER + _PLAYER + 'QQ' + _BOARD + _BOARD)
+NO_OWNER = 255
+
+
+def pack_state(node):
+    cur, sec = node.current_player, node.second_player
+    return STATE.pack(
+        cur.ID, cur.position, float(cur.balance), cur.in_jail, cur.jail_turns,
+        sec.ID, sec.position, float(sec.balance), sec.in_jail, sec.jail_turns,
+        sum(1 << prop.position for prop in cur.properties),
+        sum(1 << prop.position for prop in sec.properties),
+        bytes(NO_OWNER if prop.owner is None else prop.owner for prop in node.properties),
+        bytes(prop.houses for prop in node.properties),
+    )
+
+
+def _unpack_player(player_id, position, balance, in_jail, jail_turns, mask, houses):
+    player = Player(player_id, balance=int(balance) if balance.is_integer() else balance, position=position)
+    player.in_jail = in_jail
+    player.jail_turns = jail_turns
+    for board_position, name, value in PROPERTY_DEFINITIONS:
+        if mask >> board_position & 1:
+            prop = Property(name, value, board_position)
+            prop.set_houses(houses[board_position])
+            player.acquire(prop)
+    return player
+
+
+def unpack_state(record, node_type, parent=None):
+    """Rebuild a Node from a packed state record"""
+    fields = STATE.unpack(record)
+    houses = {board_position: count for (board_position, _, _), count in zip(PROPERTY_DEFINITIONS, fields[13])}
+    current_player = _unpack_player(*fields[0:5], fields[10], houses)
+    second_player = _unpack_player(*fields[5:10], fields[11], houses)
+    properties = []
+    for (board_position, name, value), owner in zip(PROPERTY_DEFINITIONS, fields[12]):
+        prop = Property(name, value, board_position)
+        prop.owner = None if owner == NO_OWNER else owner
+        prop.set_houses(houses[board_position])
+        properties.append(prop)
+    return Node(properties, current_player, second_player,
+                "chance" if node_type == CHANCE else "non-chance", parent)
+
+
+class ArrayTree:
+    def __init__(self, root_node, cancel_token=None):
+        self.rootNode = root_node
+        self.cancel_token = cancel_token
+        self.completed = True
+        # tree.SearchResult of the last finished search
+        self.result = None
+
+        self.parent = array('i')
+        self.node_type = array('b')
+        self.mover = array('b')          # ID of the player to move
+        self.action_code = array('i')    # bitmask of dice rolls (_ROLL_BITS), or ACTION_CODES for decisions
+        self.probability = array('d')    # probability of the dice outcome (chance children)
+        self.first_child = array('i')
+        self.child_count = array('h')
+        self.zero_value = array('d')
+        self.one_value = array('d')
+        self.states = bytearray()
+
+    def __len__(self):
+        return len(self.parent)
+
+    def memory_bytes(self):
+        columns = (self.parent, self.node_type, self.mover, self.action_code, self.probability,
+                   self.first_child, self.child_count, self.zero_value, self.one_value)
+        return sum(column.itemsize * len(column) for column in columns) + len(self.states)
+
+    def is_cancelled(self):
+        return self.cancel_token is not None and self.cancel_token.cancelled
+
+    def _add(self, node, parent_index, action_code):
+        self.parent.append(parent_index)
+        self.node_type.append(CHANCE if node.node_type == "chance" else DECISION)
+        self.mover.append(node.current_player.ID)
+        self.action_code.append(action_code)
+        self.probability.append(node.probability)
+        self.first_child.append(-1)
+        self.child_count.append(0)
+        self.zero_value.append(0.0)
+        self.one_value.append(0.0)
+        self.states += pack_state(node)
+
+    def state(self, index):
+        return bytes(self.states[index * STATE.size:(index + 1) * STATE.size])
+
+    def node_at(self, index, parent=None):
+        return unpack_state(self.state(index), self.node_type[index], parent)
+
+    def generate_tree(self, depth):
+        """Breadth-first expansion to `depth` plies, same rules as MonopolyTree"""
+        self._add(self.rootNode, -1, 0)
+        level_start, level_end = 0, 1
+        for _ in range(depth):
+            for index in range(level_start, level_end):
+                if self.is_cancelled():
+                    self.completed = False
+                    return
+                node = self.node_at(index)
+                # Terminal conditions: bankruptcy or someone won
+                if index > 0 and search_terminal(node):
+                    continue
+                self.first_child[index] = len(self)
+                for action in node.legal_actions():
+                    child = node.make_child(action)
+                    if node.node_type == "chance":
+                        code = sum(_ROLL_BITS[roll] for roll in child.rolls)
+                    else:
+                        code = ACTION_CODES[action]
+                    self._add(child, index, code)
+                self.child_count[index] = len(self) - self.first_child[index]
+            level_start, level_end = level_end, len(self)
+
+    def evaluate(self):
+        """Score the leaves, then back values up in one reverse sweep"""
+        for index in reversed(range(len(self))):
+            if self.is_cancelled():
+                return False
+            count = self.child_count[index]
+            if count == 0:
+                zero_value, one_value = self.node_at(index).utility()
+            else:
+                first = self.first_child[index]
+                if self.node_type[index] == CHANCE:
+                    # Expected value over the dice outcomes
+                    children = range(first, first + count)
+                    zero_value = sum(self.probability[child] * self.zero_value[child] for child in children)
+                    one_value = sum(self.probability[child] * self.one_value[child] for child in children)
+                else:
+                    # Decision: the mover maximises their own value (first best wins ties)
+                    values = self.zero_value if self.mover[index] == 0 else self.one_value
+                    best = first
+                    for child in range(first + 1, first + count):
+                        if values[child] > values[best]:
+                            best = child
+                    zero_value, one_value = self.zero_value[best], self.one_value[best]
+            self.zero_value[index] = zero_value
+            self.one_value[index] = one_value
+        return True
+
+    def search(self, depth):
+        """Generate and evaluate; attaches the root's children to the root node.
+
+        Returns False if the search was cancelled.
+        """
+        self.generate_tree(depth)
+        finished = self.evaluate() and self.completed
+        if finished:
+            self._materialize_root()
+            self.result = tree.SearchResult(self.rootNode)
+        return finished
+
+    def _materialize_root(self):
+        # The game loops walk root.action, so the root's children become Nodes
+        root = self.rootNode
+        root.zero_value, root.one_value = self.zero_value[0], self.one_value[0]
+        first = self.first_child[0]
+        for index in range(first, first + self.child_count[0]):
+            child = self.node_at(index, parent=root)
+            child.round = root.round + 1
+            child.zero_value, child.one_value = self.zero_value[index], self.one_value[index]
+            child.known_value = True
+            code = self.action_code[index]
+            if self.node_type[0] == CHANCE:
+                child.rolls = tuple(roll for roll, bit in _ROLL_BITS.items() if code & bit)
+                child.probability = self.probability[index]
+                action = child.rolls[0]
+            else:
+                action = ACTION_NAMES[code]
+            root.action.append((action, child))
+            root.children.append(child)
+        # As Node.Eval picks: the likeliest roll, or the first best action
+        if self.node_type[0] == CHANCE:
+            root.best_action = max(root.action, key=lambda item: item[1].probability)[0]
+        elif self.mover[0] == 0:
+            root.best_action = max(root.action, key=lambda item: item[1].zero_value)[0]
+        else:
+            root.best_action = max(root.action, key=lambda item: item[1].one_value)[0]
+
+
+def compare(depth):
+    """Peak memory and time of MonopolyTree vs ArrayTree from the start position.
+
+    peak/node is the tracemalloc peak of the whole search per node, for both
+    trees; columns/node is only ArrayTree's column and state storage, what
+    it keeps once the transient Nodes are gone.
+    """
+    from opening_book import start_node
+
+    for name, make_tree in (("MonopolyTree", tree.MonopolyTree), ("ArrayTree", ArrayTree)):
+        root = start_node().get_children()[0]
+        tracemalloc.start()
+        start = time.perf_counter()
+        search_tree = make_tree(root)
+        search_tree.search(depth)
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        if isinstance(search_tree, ArrayTree):
+            nodes = len(search_tree)
+            columns = f" columns/node={search_tree.memory_bytes() / nodes:6.1f}B"
+        else:
+            nodes = sum(len(level) for level in root.levelOrderTraversal())
+            columns = ""
+        values = [(action, round(child.zero_value, 1), round(child.one_value, 1)) for action, child in root.action]
+        print(f"{name:13s} nodes={nodes:7d} time={elapsed:6.2f}s peak={peak / 1e6:7.1f}MB "
+              f"peak/node={peak / nodes:8.1f}B{columns}")
+        print(f"{'':13s} root values {values}")
+        del search_tree, root
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare object and array tree storage")
+    parser.add_argument("--depth", type=int, default=5)
+    args = parser.parse_args()
+    compare(args.depth)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Beam search at decision nodes.
+
+MonopolyTree normally searches every legal action of a decision node to the
+full depth. With a Beam, the children of a decision node are first scored
+cheaply - a static Node.utility call, or the expected utility one dice roll
+later - and only the best B of them, for the player to move, are searched
+further. B is set per decision level, counting only decision nodes, not
+the chance nodes between them; None keeps every child. The default keeps
+the root at full width, so every root action still gets a value, and
+follows only the best-looking action below it:
+
+    tree.MonopolyTree(root, beam=Beam((None, 1))).search(7)
+
+Report latency and node counts against full-width search with:
+    python beam_search.py --depths 5 7 --widths none 1
+"""
+
+import argparse
+import time
+
+DEFAULT_WIDTHS = (None, 1)
+PRESCORERS = ("static", "lookahead")
+
+
+class Beam:
+    """`widths[level]` children are kept at decision nodes with `level`
+    decision nodes above them (the last entry applies to every deeper
+    level); None keeps them all"""
+
+    def __init__(self, widths=DEFAULT_WIDTHS, prescore="static"):
+        if prescore not in PRESCORERS:
+            raise ValueError(f"prescore must be one of {PRESCORERS}")
+        self.widths = tuple(widths)
+        self.prescore = prescore
+
+    def width(self, level):
+        return self.widths[min(level, len(self.widths) - 1)]
+
+    def _score(self, child, mover):
+        if self.prescore == "static":
+            zero_value, one_value = child.utility()
+        else:
+            # Expected utility once the opponent has rolled. Utility only
+            # depends on balances and ownership, so each roll's balance
+            # changes are applied in place and undone instead of copying state
+            zero_value = one_value = 0.0
+            roller, other = child.current_player, child.second_player
+            for _, probability, outcome in child.roll_groups().values():
+                _, balance_change, opponent_change, _, _ = outcome
+                roller.balance += balance_change
+                other.balance += opponent_change
+                rolled_zero, rolled_one = child.utility()
+                roller.balance -= balance_change
+                other.balance -= opponent_change
+                zero_value += probability * rolled_zero
+                one_value += probability * rolled_one
+        return zero_value if mover == 0 else one_value
+
+    def children(self, node, level):
+        """Children of decision node `node` to search, after dropping all but the best `width`"""
+        width = self.width(level)
+        if width is None:
+            return node.iter_children()
+        children = node.get_children()
+        if len(children) <= width:
+            return children
+        mover = node.current_player.ID
+        kept = sorted(children, key=lambda child: self._score(child, mover), reverse=True)[:width]
+        node.action = [(action, child) for action, child in node.action if child in kept]
+        node.children = [child for child in node.children if child in kept]
+        return kept
+
+
+def count_nodes(root):
+    """Nodes in the searched tree below and including `root`"""
+    count, stack = 0, [root]
+    while stack:
+        node = stack.pop()
+        count += 1
+        stack.extend(child for _, child in node.action)
+    return count
+
+
+def benchmark(depths=(5, 7), widths=DEFAULT_WIDTHS, positions=40):
+    import tree
+    from quiescence import sample_positions
+
+    roots = sample_positions(positions)
+    for depth in depths:
+        print(f"depth {depth}, {len(roots)} positions from random games:")
+        reference = None
+        for prescore in (None,) + PRESCORERS:
+            beam = None if prescore is None else Beam(widths, prescore)
+            actions, nodes = [], 0
+            start = time.perf_counter()
+            for root in roots:
+                node = root.detached()
+                tree.MonopolyTree(node, beam=beam).search(depth)
+                nodes += count_nodes(node)
+                actions.append(node.best_action)
+            elapsed = time.perf_counter() - start
+            if reference is None:
+                reference = actions
+            agree = sum(a == b for a, b in zip(actions, reference))
+            label = "full width" if prescore is None else f"beam {prescore}"
+            print(f"    {label:16s} {nodes / len(roots):9.1f} nodes/move {1000 * elapsed / len(roots):8.1f} ms/move "
+                  f"{agree}/{len(roots)} same action as full width")
+
+
+def _width(text):
+    return None if text.lower() == "none" else int(text)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Beam search against full-width search")
+    parser.add_argument("--depths", type=int, nargs="+", default=[5, 7])
+    parser.add_argument("--widths", type=_width, nargs="+", default=list(DEFAULT_WIDTHS),
+                        help="children kept per decision level ('none' for all), the last repeating")
+    parser.add_argument("--positions", type=int, default=40)
+    args = parser.parse_args()
+    benchmark(args.depths, tuple(args.widths), args.positions)
+
+
+if __name__ == "__main__":
+    main()
@@ -174,6 +174,45 @@ CORNER_SIZE = 85
 PROPERTY_WIDTH = int((BOARD_WIDTH - 2 * CORNER_SIZE) / 9)
 PROPERTY_HEIGHT = int((BOARD_HEIGHT - 2 * CORNER_SIZE) / 9)
 
+
+def compute_board_geometry(width, height, corner, pw, ph):
+    """Pixel layout of the 40 spaces as {index: ((x, y, w, h), angle, type)}.
+
+    Plain tuples so the layout can be computed without pygame; the renderer
+    wraps them in pygame.Rect.
+    """
+    geometry = {}
+    
+    # Bottom row: 0 = GO (bottom-right), 1-9 right to left, 10 = JAIL (bottom-left)
+    geometry[0] = ((width - corner, height - corner, corner, corner), 0, 'corner')
+    for i in range(1, 10):
+        x = width - corner - (i * pw)
+        geometry[i] = ((int(x), height - corner, int(pw), int(corner)), 0, 'property')
+    geometry[10] = ((0, height - corner, corner, corner), 0, 'corner')
+    
+    # Left side: 11-19 bottom to top, 20 = FREE PARKING (top-left)
+    for i in range(1, 10):
+        y = height - corner - (i * ph)
+        geometry[10 + i] = ((0, int(y), int(corner), int(ph)), 90, 'property')
+    geometry[20] = ((0, 0, corner, corner), 0, 'corner')
+    
+    # Top row: 21-29 left to right, 30 = GO TO JAIL (top-right)
+    for i in range(1, 10):
+        x = corner + ((i - 1) * pw)
+        geometry[20 + i] = ((int(x), 0, int(pw), int(corner)), 0, 'property')
+    geometry[30] = ((width - corner, 0, corner, corner), 0, 'corner')
+    
+    # Right side: 31-39 top to bottom
+    for i in range(1, 10):
+        y = corner + ((i - 1) * ph)
+        geometry[30 + i] = ((width - corner, int(y), int(corner), int(ph)), 270, 'property')
+    
+    return geometry
+
+
+# Precomputed layout for the default board size
+BOARD_GEOMETRY = compute_board_geometry(BOARD_WIDTH, BOARD_HEIGHT, CORNER_SIZE, PROPERTY_WIDTH, PROPERTY_HEIGHT)
+
 # Colors
 COLOR_BACKGROUND = (34, 139, 34)  # Forest green like real Monopoly
 COLOR_CENTER = (245, 245, 220)  # Beige center
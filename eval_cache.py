@@ -0,0 +1,126 @@
+"""
+Disk-backed cache of searched state values, shared across games and runs.
+
+Keys are (state key, search depth) and values are the backed-up
+zero_value/one_value of that state. The store is an SQLite database in WAL
+mode, so several worker processes can read and write it at the same time;
+entries carry a last-used stamp and the least recently used ones are evicted
+once the cache grows past its size cap.
+"""
+
+import os
+import sqlite3
+import time
+
+from node import RULES_VERSION
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "eval_cache.sqlite3")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS evals (
+    key INTEGER NOT NULL,
+    depth INTEGER NOT NULL,
+    zero_value REAL NOT NULL,
+    one_value REAL NOT NULL,
+    used REAL NOT NULL,
+    PRIMARY KEY (key, depth)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS evals_used ON evals (used);
+"""
+
+
+def _signed(key):
+    # SQLite integers are signed 64-bit, state keys are unsigned
+    return key - (1 << 64) if key >= (1 << 63) else key
+
+
+class EvalCache:
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_entries=500_000, min_depth=2):
+        self.path = path
+        self.max_entries = max_entries
+        # Shallower subtrees are cheaper to search than to look up
+        self.min_depth = min_depth
+        self.hits = 0
+        self.misses = 0
+        self._pending = {}
+        self._touched = set()
+        # The GUI opens the cache on the UI thread and searches on the game thread
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._check_rules_version()
+
+    def _check_rules_version(self):
+        # Values searched under other game rules are wrong under these
+        self._conn.execute("BEGIN IMMEDIATE")
+        if self._conn.execute("PRAGMA user_version").fetchone()[0] != RULES_VERSION:
+            self._conn.execute("DELETE FROM evals")
+            self._conn.execute(f"PRAGMA user_version = {RULES_VERSION}")
+        self._conn.execute("COMMIT")
+
+    @classmethod
+    def open(cls, path=DEFAULT_CACHE_PATH, **kwargs):
+        """Open the cache, or return None if the database cannot be used"""
+        try:
+            return cls(path, **kwargs)
+        except sqlite3.Error as e:
+            print(f"Evaluation cache disabled: {e}")
+            return None
+
+    def get(self, key, depth):
+        """(zero_value, one_value) searched to at least `depth`, or None"""
+        row = self._conn.execute(
+            "SELECT zero_value, one_value, depth FROM evals WHERE key = ? AND depth >= ? "
+            "ORDER BY depth DESC LIMIT 1", (_signed(key), depth)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._touched.add((_signed(key), row[2]))
+        return row[0], row[1]
+
+    def put(self, key, depth, zero_value, one_value):
+        """Queue a value; written on the next flush()"""
+        self._pending[(_signed(key), depth)] = (zero_value, one_value)
+
+    def flush(self):
+        """Write queued values and hit stamps in one transaction, then evict"""
+        if not self._pending and not self._touched:
+            return
+        now = time.time()
+        try:
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO evals (key, depth, zero_value, one_value, used) VALUES (?, ?, ?, ?, ?)",
+                [(key, depth, zero_value, one_value, now)
+                 for (key, depth), (zero_value, one_value) in self._pending.items()])
+            self._conn.executemany(
+                "UPDATE evals SET used = ? WHERE key = ? AND depth = ?",
+                [(now, key, depth) for key, depth in self._touched])
+            self._evict()
+            self._conn.execute("COMMIT")
+        except sqlite3.Error:
+            if self._conn.in_transaction:
+                self._conn.execute("ROLLBACK")
+            raise
+        finally:
+            self._pending.clear()
+            self._touched.clear()
+
+    def _evict(self):
+        count = self._conn.execute("SELECT COUNT(*) FROM evals").fetchone()[0]
+        if count <= self.max_entries:
+            return
+        # Evict down to 90% of the cap so eviction does not run on every flush
+        excess = count - int(self.max_entries * 0.9)
+        self._conn.execute(
+            "DELETE FROM evals WHERE (key, depth) IN "
+            "(SELECT key, depth FROM evals ORDER BY used LIMIT ?)", (excess,))
+
+    def __len__(self):
+        return self._conn.execute("SELECT COUNT(*) FROM evals").fetchone()[0]
+
+    def close(self):
+        self.flush()
+        self._conn.close()
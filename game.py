@@ -1,36 +1,136 @@
-import random
 import sys
 
+import alphabeta
+import array_tree
+import eval_cache
+import lazy_smp
+import maxn
+import opening_book
 import player
 import property
 import tree
-from node import Node
+from node import Node, POSITION_TO_SPACE, roll_dice
 
 
 class Game:
-    def __init__(self, players):
+    def __init__(self, players, zero_sum=False, workers=1, rent_flow_turns=0, evaluator=None, sampler=None,
+                 quiescence=0, beam=None, max_nodes=maxn.DEFAULT_MAX_NODES, maxn_mode="maxn", store="object"):
         self.players: list[player.Player] = players
         self.current_player = players[0]
         self.turn = 0
         self.properties = property.properties  # Add this line to define the 'board' attribute
+        property.assign_random_taxes(self.properties)
+        # Credit owned properties with the rent they are expected to earn
+        # over this many opponent turns (see landing.py); set on Node only
+        # while this game searches
+        self.rent_flow_turns = rent_flow_turns
+        # Precomputed early-game decisions, if the book has been built
+        self.book = opening_book.OpeningBook.load()
+        # Searched state values persisted across games and runs
+        self.cache = eval_cache.EvalCache.open()
+        # Optional batch leaf evaluator, e.g. value_model.LeafEvaluator
+        self.evaluator = evaluator
+        # Optional sparse_sampling.SparseSampler for deeper, sampled searches
+        self.sampler = sampler
+        # Extension plies for volatile leaves (see quiescence.py)
+        self.quiescence = quiescence
+        # Optional beam_search.Beam narrowing decision nodes to their best children
+        self.beam = beam
+        # "object": MonopolyTree; "array": array_tree.ArrayTree, which holds
+        # large trees in less memory but has none of the options above
+        if store not in ("object", "array"):
+            raise ValueError("store must be 'object' or 'array'")
+        if store == "array" and (zero_sum or evaluator is not None or sampler is not None or quiescence or beam is not None):
+            raise ValueError("the array store only runs plain searches")
+        self.store = store
+        if not Node.default_evaluation() or evaluator is not None or rent_flow_turns:
+            # Both hold values of the stock evaluation
+            self.book = self.cache = None
+        # Zero-sum mode: alpha-beta search on player 0's advantage, with a
+        # transposition table kept across turns for move ordering, cleared
+        # once it outgrows alphabeta.MAX_TABLE_ENTRIES
+        self.zero_sum = zero_sum
+        self.table = {}
+        # Zero-sum searches with more than one worker run as Lazy SMP
+        self.workers = workers
+        # Games of 3 or more players use maxn.py: max-n or paranoid search,
+        # within this many nodes per move
+        self.max_nodes = max_nodes
+        self.maxn_mode = maxn_mode
+        # Best actions along the last search's principal variation, tried
+        # first when the next search reaches those states
+        self.pv = {}
 
     def roll_dice(self):
-        die = random.randint(1, 6)
-        return die
+        return roll_dice()
 
     def next_player(self):
         index = self.players.index(self.current_player)
         self.current_player = self.players[(index + 1) % len(self.players)]
 
+    def search(self, node, depth):
+        previous = Node.rent_flow_turns
+        Node.rent_flow_turns = self.rent_flow_turns
+        try:
+            return self._search(node, depth)
+        finally:
+            Node.rent_flow_turns = previous
+
+    def _search(self, node, depth):
+        if self.zero_sum and self.workers > 1:
+            finished, _, result = lazy_smp.parallel_search(node, depth, self.workers, pv=self.pv)
+            if result is not None:
+                self.pv = result.pv_moves
+            return finished
+        if self.zero_sum:
+            if len(self.table) > alphabeta.MAX_TABLE_ENTRIES:
+                self.table.clear()
+            search = alphabeta.AlphaBetaSearch(node, table=self.table, pv=self.pv)
+        elif self.store == "array":
+            search = array_tree.ArrayTree(node)
+        else:
+            search = tree.MonopolyTree(node, book=self.book, cache=self.cache, evaluator=self.evaluator,
+                                       sampler=self.sampler, quiescence=self.quiescence,
+                                       beam=self.beam, pv=self.pv)
+        finished = search.search(depth)
+        if search.result is not None:
+            self.pv = search.result.pv_moves
+        return finished
+
+    def play_multiplayer_game(self):
+        node = maxn.MultiNode.start(len(self.players))
+        while True:
+            won = maxn.winner(node)
+            if won is not None:
+                print(f"player {won} win !")
+                sys.exit(0)
+            if node.node_type == "chance":
+                total, doubles = dice = self.roll_dice()
+                print(f"player {node.mover} got {total}{' (doubles)' if doubles else ''}")
+                node = node.child_for_roll(dice)
+                continue
+            node.action = []
+            previous = Node.rent_flow_turns
+            Node.rent_flow_turns = self.rent_flow_turns
+            try:
+                maxn.MaxnSearch(node, self.max_nodes, mode=self.maxn_mode).search(8)
+            finally:
+                Node.rent_flow_turns = previous
+            action = maxn.best_action(node)
+            mover = node.players[node.mover]
+            print(f"{action} ( position: {POSITION_TO_SPACE[mover.position]} ) (cash before action:{mover.balance})")
+            print()
+            node = next(child for name, child in node.action if name == action)
+
     def play_game(self):
+        if len(self.players) > 2:
+            return self.play_multiplayer_game()
         root = Node(self.properties, self.players[0], self.players[1], "non-chance", None)
-        mono_tree = tree.MonopolyTree(root)
 
         # The higher the level of intelligence, the more time it takes to make a decision,
         # but the decisions are more rational.
         intelligence_level = 5
-        mono_tree.generate_tree(intelligence_level)
-        Node.Eval(mono_tree)
+        self.search(root, intelligence_level)
 
         current_node = root
         while True:
@@ -41,25 +141,20 @@ class Game:
                 print(f"player {current_node.second_player.ID} win !")
                 sys.exit(0)
 
+            if self.beam is not None and current_node.node_type != "chance" and current_node.parent is not None:
+                # Below the searched root the beam kept only the best-looking
+                # actions, so search the decision again at full width
+                current_node.action, current_node.children = [], []
             if len(current_node.action) == 0:
-                mono_tree = tree.MonopolyTree(current_node)
-                mono_tree.generate_tree(intelligence_level)
-                Node.Eval(mono_tree)
+                self.search(current_node, intelligence_level)
             if current_node.node_type == "chance":
                 dice = self.roll_dice()
                 name = "zero" if current_node.current_player.ID == 0 else "one"
-                print(f"player {name} got {dice}")
-                current_node = current_node.action[dice - 1][1]
+                total, doubles = dice
+                print(f"player {name} got {total}{' (doubles)' if doubles else ''}")
+                current_node = current_node.child_for_roll(dice)
             else:
-                if current_node.current_player.ID == 0:
-                    current_node.action.sort(key=lambda tup: tup[1].zero_value, reverse=True)
-                    print(
-                        f"{current_node.action[0][0]} ( position: {current_node.properties[current_node.current_player.position].name} ) (cash before action:{current_node.current_player.balance})")
-                    current_node = current_node.action[0][1]
-
-                else:
-                    current_node.action.sort(key=lambda tup: tup[1].one_value, reverse=True)
-                    print(
-                        f"{current_node.action[0][0]} ( position: {current_node.properties[current_node.current_player.position].name} ) (cash before action:{current_node.current_player.balance})")
-                    current_node = current_node.action[0][1]
+                print(
+                    f"{current_node.best_action} ( position: {POSITION_TO_SPACE[current_node.current_player.position]} ) (cash before action:{current_node.current_player.balance})")
+                current_node = current_node.best_child()
                 print()
@@ -0,0 +1,99 @@
+"""
+Long-run landing probabilities for the 40 board squares.
+
+Node.utility values a property at value + 10 * rent whether or not anyone is
+likely to land on it. Here the movement rules of roll_outcome - dice rolls,
+GO TO JAIL, the Chance and Community Chest teleports, jail turns - are run
+as a Markov chain over (position, in_jail, jail_turns) and iterated to its
+stationary distribution, giving the probability that a turn ends on each
+square. expected_rent_flow() turns that into rent per opponent turn, which
+Node.utility adds when Node.rent_flow_turns is set.
+
+Print the distribution with:
+    python landing.py
+"""
+
+import argparse
+import functools
+
+from board_config import BOARD_LAYOUT
+from node import DICE_OUTCOMES, roll_outcome
+from player import Player
+
+
+def _next_states(state):
+    """[(next state, probability)] after one turn from `state`"""
+    position, in_jail, jail_turns = state
+    # The balance only decides whether the jail fine is paid, not where the player goes
+    player = Player(0, position=position)
+    player.in_jail = in_jail
+    player.jail_turns = jail_turns
+    transitions = []
+    for roll, probability in DICE_OUTCOMES:
+        next_position, _, _, next_in_jail, next_jail_turns = roll_outcome(player, roll)
+        transitions.append(((next_position, next_in_jail, next_jail_turns), probability))
+    return transitions
+
+
+def transition_table():
+    """{state: [(next state, probability)]} over every reachable state"""
+    start = (0, False, 0)
+    table = {}
+    frontier = [start]
+    while frontier:
+        state = frontier.pop()
+        if state in table:
+            continue
+        table[state] = _next_states(state)
+        frontier.extend(next_state for next_state, _ in table[state] if next_state not in table)
+    return table
+
+
+def stationary_distribution(tolerance=1e-12, max_iterations=10_000):
+    """{state: long-run probability}, by power iteration from the start square"""
+    table = transition_table()
+    distribution = {state: 0.0 for state in table}
+    distribution[(0, False, 0)] = 1.0
+    for _ in range(max_iterations):
+        next_distribution = dict.fromkeys(table, 0.0)
+        for state, mass in distribution.items():
+            if mass:
+                for next_state, probability in table[state]:
+                    next_distribution[next_state] += mass * probability
+        # Average with the previous step so a periodic chain still converges
+        next_distribution = {state: 0.5 * (distribution[state] + next_distribution[state])
+                             for state in table}
+        change = sum(abs(next_distribution[state] - distribution[state]) for state in table)
+        distribution = next_distribution
+        if change < tolerance:
+            break
+    return distribution
+
+
+@functools.lru_cache(maxsize=None)
+def landing_probabilities():
+    """Probability that a turn ends on each of the 40 squares (jail counts as 10)"""
+    probabilities = [0.0] * 40
+    for (position, _, _), mass in stationary_distribution().items():
+        probabilities[position] += mass
+    return tuple(probabilities)
+
+
+def expected_rent_flow(owner):
+    """Expected rent `owner` collects from their properties per opponent turn"""
+    landing = landing_probabilities()
+    return sum(landing[prop.position] * owner.rent_due(prop) for prop in owner.properties)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Print the stationary landing distribution")
+    parser.add_argument("--top", type=int, default=40, help="number of squares to list")
+    args = parser.parse_args()
+    landing = landing_probabilities()
+    ranked = sorted(range(40), key=lambda position: -landing[position])
+    for position in ranked[:args.top]:
+        print(f"{position:2d} {BOARD_LAYOUT[position]:24s} {landing[position]:7.3%}")
+
+
+if __name__ == "__main__":
+    main()
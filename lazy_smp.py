@@ -0,0 +1,224 @@
+"""
+Lazy SMP: several processes searching the same root at once.
+
+Every worker runs the zero-sum AlphaBetaSearch on the same root; helpers
+shuffle their move order (and odd helpers go one ply deeper) so they drift
+into different parts of the tree. All of them read and write one
+transposition table in multiprocessing.shared_memory, so a subtree one
+worker has searched is a table hit for the others. The main worker's result
+is the answer; the helpers are stopped as soon as it finishes. A worker that
+fails or dies takes the whole search down with it, with its traceback.
+
+Report the speedup at several worker counts with:
+    python lazy_smp.py --depth 6 --workers 1 2 4 8 16
+"""
+
+import argparse
+import multiprocessing
+import os
+import queue
+import struct
+import time
+import traceback
+from multiprocessing import shared_memory
+
+import alphabeta
+import tree
+from node import ACTION_CODES, ACTION_NAMES, UTILITY_WEIGHTS, Node, set_utility_weights
+
+# Entry: state key, search depth, bound flag, best action code, value
+ENTRY = struct.Struct('<QbbB5xd')
+NO_ACTION = 255
+# How often the main process checks that silent workers are still alive
+POLL_SECONDS = 1.0
+
+
+class SharedTranspositionTable:
+    """Fixed-size, always-replace-if-deeper hash table in shared memory.
+
+    Slots are guarded by striped locks: slot i uses lock i % len(locks), so
+    workers only contend when they touch the same stripe. Behaves like the
+    dict AlphaBetaSearch uses by default (get / item assignment).
+    """
+
+    def __init__(self, entries=1 << 20, stripes=64):
+        self.entries = entries
+        self.shm = shared_memory.SharedMemory(create=True, size=entries * ENTRY.size)
+        self.shm.buf[:] = bytes(entries * ENTRY.size)
+        self.locks = [multiprocessing.Lock() for _ in range(stripes)]
+        # Only the creating process unlinks the block, even if forked workers
+        # inherit this object as it is
+        self.owner_pid = os.getpid()
+
+    def __getstate__(self):
+        # Sent to worker processes: they attach to the same block by name
+        return {'name': self.shm.name, 'entries': self.entries, 'locks': self.locks}
+
+    def __setstate__(self, state):
+        self.entries = state['entries']
+        self.locks = state['locks']
+        self.shm = shared_memory.SharedMemory(name=state['name'])
+        self.owner_pid = None
+
+    def _slot(self, key):
+        index = key % self.entries
+        return index, index * ENTRY.size, self.locks[index % len(self.locks)]
+
+    def get(self, key, default=None):
+        index, offset, lock = self._slot(key)
+        with lock:
+            entry_key, depth, flag, code, value = ENTRY.unpack_from(self.shm.buf, offset)
+        if entry_key != key or key == 0:
+            return default
+        return depth, flag, value, None if code == NO_ACTION else ACTION_NAMES[code]
+
+    def __setitem__(self, key, entry):
+        depth, flag, value, best_action = entry
+        code = NO_ACTION if best_action is None else ACTION_CODES[best_action]
+        index, offset, lock = self._slot(key)
+        with lock:
+            entry_key, entry_depth = struct.unpack_from('<Qb', self.shm.buf, offset)
+            # Keep the deeper result when two states collide on a slot
+            if entry_key == key or entry_key == 0 or depth >= entry_depth:
+                ENTRY.pack_into(self.shm.buf, offset, key, depth, flag, code, value)
+
+    def close(self):
+        self.shm.close()
+        if self.owner_pid == os.getpid():
+            self.shm.unlink()
+
+
+def _worker(root, depth, table, stop_event, worker_id, results, pv, rent_flow_turns, weights):
+    try:
+        # A spawned process imports node afresh: evaluate as the parent does
+        Node.rent_flow_turns = rent_flow_turns
+        set_utility_weights(weights)
+        token = tree.CancellationToken(event=stop_event)
+        if worker_id == 0:
+            search = alphabeta.AlphaBetaSearch(root, cancel_token=token, table=table, pv=pv)
+        else:
+            # Helpers: different move order, and every other one a ply deeper
+            search = alphabeta.AlphaBetaSearch(root, cancel_token=token, table=table, order_seed=worker_id, pv=pv)
+            depth += worker_id % 2
+        finished = search.search(depth)
+        answer = None
+        if worker_id == 0:
+            result = search.result
+            answer = ([child.zero_value for _, child in root.action], root.best_action,
+                      None if result is None else (result.principal_variation, result.pv_moves))
+        results.put((worker_id, finished, answer, search.nodes, None))
+    except Exception:
+        results.put((worker_id, False, None, 0, traceback.format_exc()))
+    finally:
+        table.close()
+
+
+def _next_result(results, processes, reported):
+    """The next worker's report; raises if a worker died without sending one"""
+    while True:
+        try:
+            return results.get(timeout=POLL_SECONDS)
+        except queue.Empty:
+            pass
+        for worker_id, process in enumerate(processes):
+            if worker_id not in reported and not process.is_alive():
+                try:
+                    # It may have reported just before exiting
+                    return results.get(timeout=POLL_SECONDS)
+                except queue.Empty:
+                    raise RuntimeError(f"Lazy SMP worker {worker_id} exited with code {process.exitcode} "
+                                       f"without a result")
+
+
+def parallel_search(root, depth, workers=4, table_entries=1 << 20, pv=None):
+    """Lazy SMP search of `root` with `workers` processes.
+
+    Like AlphaBetaSearch.search, leaves the root's children with their
+    zero-sum values; `pv` seeds move ordering as AlphaBetaSearch's does.
+    Returns (finished, total nodes searched by all workers, the main
+    worker's tree.SearchResult or None if it did not finish).
+    """
+    alphabeta.expand_root(root)
+    table = SharedTranspositionTable(table_entries)
+    stop_event = multiprocessing.Event()
+    results = multiprocessing.Queue()
+    # Workers get a detached copy; root.action order is preserved by make_child
+    processes = [multiprocessing.Process(target=_worker,
+                                         args=(root.detached(), depth, table, stop_event, i, results, pv,
+                                               Node.rent_flow_turns, dict(UTILITY_WEIGHTS)))
+                 for i in range(workers)]
+    try:
+        for process in processes:
+            process.start()
+        nodes = 0
+        finished = False
+        search_result = None
+        reported = set()
+        for _ in processes:
+            worker_id, worker_finished, answer, worker_nodes, error = _next_result(results, processes, reported)
+            reported.add(worker_id)
+            if error is not None:
+                raise RuntimeError(f"Lazy SMP worker {worker_id} failed:\n{error}")
+            nodes += worker_nodes
+            if worker_id == 0:
+                finished = worker_finished
+                if finished:
+                    values, best_action, line = answer
+                    alphabeta.set_root_values(root, values, best_action)
+                    search_result = tree.SearchResult(root)
+                    if line is not None:
+                        # The worker followed its line through the table
+                        search_result.principal_variation, search_result.pv_moves = line
+                # The main worker's answer is all that counts; stop the helpers
+                stop_event.set()
+        for process in processes:
+            process.join()
+    finally:
+        stop_event.set()
+        for process in processes:
+            if process.pid is None:
+                continue
+            if process.is_alive():
+                process.terminate()
+            process.join()
+        table.close()
+    return finished, nodes, search_result
+
+
+def benchmark(depth, worker_counts, positions=4, seed=3):
+    """Time to search sample positions at each worker count"""
+    import random
+    from opening_book import start_node
+
+    rng = random.Random(seed)
+    samples = []
+    node = start_node()
+    while len(samples) < positions:
+        tree.MonopolyTree(node).search(1)
+        if node.node_type != "chance":
+            samples.append(node.detached())
+        node = rng.choice(node.action)[1].detached()
+
+    print(f"{multiprocessing.cpu_count()} CPUs, depth {depth}, {positions} positions")
+    baseline = None
+    for workers in worker_counts:
+        start = time.perf_counter()
+        nodes = 0
+        for sample in samples:
+            nodes += parallel_search(sample.detached(), depth, workers)[1]
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        print(f"workers={workers:2d} time={elapsed:7.2f}s speedup={baseline / elapsed:5.2f}x nodes={nodes}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lazy SMP speedup at several worker counts")
+    parser.add_argument("--depth", type=int, default=6)
+    parser.add_argument("--positions", type=int, default=4)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    args = parser.parse_args()
+    benchmark(args.depth, args.workers, args.positions)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,393 @@
+"""
+Max-n search for games of 3 to 6 players.
+
+Node and its searches are built for two players (current_player and
+second_player, zero_value and one_value). A MultiNode holds every player, in
+turn order, and a searched node is worth a vector with one entry per player:
+their share of the table's total Node.utility score (negative scores count
+as zero), so the entries lie in [0, 1] and sum to 1. Decisions follow the
+two-player rules of Node, applied between the mover and the owner of the
+square they stand on; trades are left out, being two-party offers.
+
+Max-n backs the vectors up with every player maximising their own entry and
+chance nodes averaging them. As the entries sum to 1, a decision node can
+stop once its mover is sure of so much that the player deciding above it
+could not gain by coming here (shallow pruning, carried through the chance
+node in between as Star1 carries alpha-beta windows). Through that chance
+node every roll still to come could give q the whole table, so the bound
+only cuts when one player already holds most of it: on positions from
+random games max-n pruning saves nothing at depths 3 and 4, while with
+balances of $300, $300 and $1900 it skips 15% of the nodes at depth 4. The
+paranoid fallback assumes instead that all opponents play against the root
+player: alpha-beta and Star1 on the root player's share, at the price of a
+gloomier view of the opponents, which saves 2-5% of the nodes. Chance nodes
+dominate the tree either way; what keeps a move's cost fixed is the budget. Searches deepen one ply
+at a time until the move's node budget (or time limit) runs out, and keep
+the last completed depth:
+
+    root = MultiNode.start(4)
+    MaxnSearch(root, max_nodes=5000).search(8)
+    best_action(root)           # child.values holds the value vector
+
+Measure per-move cost and pruning for 4 players with:
+    python maxn.py --players 4 --max-nodes 5000
+"""
+
+import argparse
+import copy
+import random
+import time
+
+from node import Node, UTILITY_WEIGHTS, player_utility, roll_dice
+from player import Player
+from property import Property, PROPERTY_DEFINITIONS
+
+MODES = ("maxn", "paranoid")
+MIN_PLAYERS, MAX_PLAYERS = 3, 6
+# Nodes one move may visit, over all deepening iterations
+DEFAULT_MAX_NODES = 5_000
+
+
+class BudgetExceeded(Exception):
+    """Raised inside the search when the move's node or time budget is spent"""
+
+
+class MultiNode:
+    """A game state with any number of players; players[i].ID == i, and turns go in ID order"""
+
+    def __init__(self, properties, players, mover, node_type):
+        self.properties = properties
+        self.players = players
+        # ID of the player to roll or decide
+        self.mover = mover
+        self.node_type = node_type
+        self.action = []
+        # Value vector after a search, and the root player's value
+        self.values = None
+        self.value = None
+        self.rolls = ()
+        self.probability = 1.0
+        self._roll_groups = None
+
+    @classmethod
+    def start(cls, count, balance=1500):
+        if not MIN_PLAYERS <= count <= MAX_PLAYERS:
+            raise ValueError(f"max-n games take {MIN_PLAYERS} to {MAX_PLAYERS} players")
+        properties = [Property(name, value, position) for position, name, value in PROPERTY_DEFINITIONS]
+        return cls(properties, [Player(i, balance=balance) for i in range(count)], 0, "non-chance")
+
+    def terminal(self):
+        """True where the search stops: a bankruptcy or a balance over the win threshold"""
+        threshold = UTILITY_WEIGHTS["win_threshold"]
+        return any(player.balance < 0 or player.balance > threshold for player in self.players)
+
+    def _view(self, node_type):
+        # Two-player Node for the mover and whoever owns their square (the
+        # rent payee), else the next player; its rules apply unchanged
+        mover = self.players[self.mover]
+        other = self.players[(self.mover + 1) % len(self.players)]
+        for prop in self.properties:
+            if prop.position == mover.position and prop.owner not in (None, mover.ID):
+                other = self.players[prop.owner]
+        return Node(self.properties, mover, other, node_type, None)
+
+    def roll_groups(self):
+        if self._roll_groups is None:
+            self._roll_groups = self._view("chance").roll_groups()
+        return self._roll_groups
+
+    def legal_actions(self):
+        if self.node_type == "chance":
+            return list(self.roll_groups())
+        return [action for action in self._view("non-chance").legal_actions() if not action.startswith("trade_")]
+
+    def make_child(self, action):
+        """Build the child reached by `action`, attach it to this node and return it"""
+        players = list(self.players)
+        if self.node_type == "chance":
+            rolls, probability, outcome = self.roll_groups()[action]
+            position, balance_change, opponent_change, in_jail, jail_turns = outcome
+            # Only balances and positions change: shallow copies of the
+            # players concerned will do, properties are shared
+            mover = players[self.mover] = copy.copy(players[self.mover])
+            mover.position, mover.in_jail, mover.jail_turns = position, in_jail, jail_turns
+            # roll_outcome collects from one opponent; every other one pays here
+            mover.balance += balance_change - opponent_change * (len(players) - 2)
+            if opponent_change:
+                for index, player in enumerate(players):
+                    if index != self.mover:
+                        players[index] = copy.copy(player)
+                        players[index].balance += opponent_change
+            child = MultiNode(self.properties, players, self.mover, "non-chance")
+            child.rolls, child.probability = rolls, probability
+        else:
+            # Node.make_child returns the two players swapped: the turn has passed
+            view_child = self._view("non-chance").make_child(action)
+            for player in (view_child.current_player, view_child.second_player):
+                players[player.ID] = player
+            child = MultiNode(view_child.properties, players, (self.mover + 1) % len(players), "chance")
+        self.action.append((action, child))
+        return child
+
+    def child_for_roll(self, roll):
+        for action, (rolls, _, _) in self.roll_groups().items():
+            if roll in rolls:
+                return self.make_child(action)
+        raise KeyError(roll)
+
+    def shares(self):
+        """Each player's share of the total utility, clipped at zero"""
+        scores = [max(player_utility(player), 0.0) for player in self.players]
+        total = sum(scores)
+        if total == 0:
+            return [1.0 / len(scores)] * len(scores)
+        return [score / total for score in scores]
+
+
+def winner(node):
+    """ID of the winner at `node`, or None: the first player over $2000, or
+    the richest player once anyone has gone bankrupt"""
+    for player in node.players:
+        if player.balance > 2000:
+            return player.ID
+    if any(player.balance < 0 for player in node.players):
+        return max(node.players, key=lambda player: player.balance).ID
+    return None
+
+
+class MaxnSearch:
+    def __init__(self, root_node, max_nodes=DEFAULT_MAX_NODES, seconds=None, mode="maxn", pruning=True):
+        if mode not in MODES:
+            raise ValueError(f"mode must be one of {MODES}")
+        self.rootNode = root_node
+        self.max_nodes = max_nodes
+        self.seconds = seconds
+        self.mode = mode
+        self.pruning = pruning
+        self.nodes = 0
+        self.completed = True
+        self.depth_reached = 0
+        self._deadline = None
+
+    def _visit(self):
+        self.nodes += 1
+        if self.max_nodes is not None and self.nodes > self.max_nodes:
+            raise BudgetExceeded()
+        if self._deadline is not None and time.perf_counter() > self._deadline:
+            raise BudgetExceeded()
+
+    def search(self, depth):
+        """Search to `depth` or until the budget runs out, deepening one ply at a time.
+
+        The root's children get `values` (max-n only) and `value`, the root
+        player's share, from the deepest completed iteration. Returns the
+        depth reached.
+        """
+        root = self.rootNode
+        if self.seconds is not None:
+            self._deadline = time.perf_counter() + self.seconds
+        if not root.action:
+            for action in root.legal_actions():
+                root.make_child(action)
+        player = root.mover
+
+        for iteration_depth in range(1, depth + 1):
+            try:
+                if self.mode == "maxn":
+                    results = [self._maxn(child, iteration_depth - 1)[0] for _, child in root.action]
+                else:
+                    results = self._paranoid_root(root, iteration_depth, player)
+            except BudgetExceeded:
+                self.completed = False
+                break
+            for (_, child), result in zip(root.action, results):
+                if self.mode == "maxn":
+                    child.values, child.value = result, result[player]
+                else:
+                    child.values, child.value = None, result
+            self.depth_reached = iteration_depth
+        return self.depth_reached
+
+    def _maxn(self, node, depth, bound=None):
+        """(value vector, exact) of `node`. With bound = (player q, threshold)
+        the search may stop once q's entry is known to be <= threshold,
+        returning exact = False: the caller then ignores this node."""
+        self._visit()
+        if depth == 0 or node.terminal():
+            return node.shares(), True
+
+        if node.node_type == "chance":
+            expected = [0.0] * len(node.players)
+            remaining = 1.0
+            groups = sorted(node.roll_groups().items(), key=lambda item: -item[1][1])
+            for action, (_, probability, _) in groups:
+                remaining -= probability
+                if remaining < 1e-12:
+                    remaining = 0.0
+                child_bound = None
+                if bound is not None and self.pruning:
+                    # Every outcome still to come gives q at most 1
+                    player, threshold = bound
+                    child_bound = (player, (threshold - expected[player] - remaining) / probability)
+                values, exact = self._maxn(node.make_child(action), depth - 1, child_bound)
+                if not exact:
+                    return values, False
+                expected = [total + probability * value for total, value in zip(expected, values)]
+            node.action = []
+            return expected, True
+
+        mover = node.mover
+        best = None
+        for action in node.legal_actions():
+            child = node.make_child(action)
+            values, exact = self._maxn(child, depth - 1, None if best is None else (mover, best[mover]))
+            if exact and (best is None or values[mover] > best[mover]):
+                best = values
+            # Shallow pruning: whatever the mover picks leaves q at most 1 - best[mover]
+            if bound is not None and self.pruning and best is not None and 1.0 - best[mover] <= bound[1]:
+                node.action = []
+                return best, False
+        node.action = []
+        return best, True
+
+    def _paranoid_root(self, root, depth, player):
+        # At a decision root, actions that cannot beat the best so far are
+        # only bounded from above, which is enough to rank them below it
+        results, alpha = [], 0.0
+        for _, child in root.action:
+            value = self._paranoid(child, depth - 1, player, alpha, 1.0)
+            results.append(value)
+            if root.node_type != "chance" and self.pruning:
+                alpha = max(alpha, value)
+        return results
+
+    def _paranoid(self, node, depth, player, alpha, beta):
+        """`player`'s share at `node`, everyone else minimising it"""
+        self._visit()
+        if depth == 0 or node.terminal():
+            return node.shares()[player]
+
+        if node.node_type == "chance":
+            # Star1 with the shares' bounds [0, 1]
+            expected, remaining = 0.0, 1.0
+            groups = sorted(node.roll_groups().items(), key=lambda item: -item[1][1])
+            for action, (_, probability, _) in groups:
+                remaining -= probability
+                if remaining < 1e-12:
+                    remaining = 0.0
+                child_alpha, child_beta = 0.0, 1.0
+                if self.pruning:
+                    child_alpha = max(0.0, (alpha - expected - remaining) / probability)
+                    child_beta = min(1.0, (beta - expected) / probability)
+                expected += probability * self._paranoid(node.make_child(action), depth - 1, player,
+                                                         child_alpha, child_beta)
+                if self.pruning:
+                    if expected + remaining <= alpha:
+                        return expected + remaining
+                    if expected >= beta:
+                        return expected
+            node.action = []
+            return expected
+
+        maximizing = node.mover == player
+        best = -1.0 if maximizing else 2.0
+        for action in node.legal_actions():
+            value = self._paranoid(node.make_child(action), depth - 1, player, alpha, beta)
+            if maximizing:
+                best = max(best, value)
+                alpha = max(alpha, value)
+            else:
+                best = min(best, value)
+                beta = min(beta, value)
+            if self.pruning and alpha >= beta:
+                break
+        node.action = []
+        return best
+
+
+def best_action(root):
+    """The root action with the highest value for the player to move"""
+    return max(root.action, key=lambda item: item[1].value)[0]
+
+
+def play_moves(players=4, moves=20, depth=8, max_nodes=DEFAULT_MAX_NODES, seconds=None, mode="maxn", seed=0):
+    """Play `moves` decisions of a `players`-player game with one engine in
+    every seat; returns [(nodes, seconds, depth reached)] per decision"""
+    rng = random.Random(seed)
+    node = MultiNode.start(players)
+    stats = []
+    while len(stats) < moves:
+        if winner(node) is not None:
+            node = MultiNode.start(players)
+        if node.node_type == "chance":
+            node = node.child_for_roll(roll_dice(rng))
+            continue
+        node.action = []
+        search = MaxnSearch(node, max_nodes, seconds, mode)
+        start = time.perf_counter()
+        search.search(depth)
+        stats.append((search.nodes, time.perf_counter() - start, search.depth_reached))
+        chosen = best_action(node)
+        node = next(child for action, child in node.action if action == chosen)
+    return stats
+
+
+def compare_pruning(players=4, depth=4, positions=6, seed=0):
+    """Fixed-depth searches with and without pruning on positions from a
+    random-policy game; max-n root values, and paranoid choices, must match"""
+    rng = random.Random(seed)
+    samples = []
+    node = MultiNode.start(players)
+    while len(samples) < positions:
+        if winner(node) is not None:
+            node = MultiNode.start(players)
+        if node.node_type == "chance":
+            node = node.child_for_roll(roll_dice(rng))
+            continue
+        actions = node.legal_actions()
+        if len(actions) > 1:
+            samples.append(node)
+        node = node.make_child(rng.choice(actions))
+
+    for mode in MODES:
+        totals = {}
+        for pruning in (False, True):
+            nodes, results = 0, []
+            for sample in samples:
+                sample.action = []
+                search = MaxnSearch(sample, max_nodes=None, mode=mode, pruning=pruning)
+                search.search(depth)
+                nodes += search.nodes
+                if mode == "maxn":
+                    results.append([tuple(round(value, 9) for value in child.values) for _, child in sample.action])
+                else:
+                    results.append(best_action(sample))
+            totals[pruning] = (nodes, results)
+        assert totals[True][1] == totals[False][1]
+        print(f"{mode:8s} depth {depth}, {len(samples)} positions: {totals[False][0]} nodes without pruning, "
+              f"{totals[True][0]} with ({totals[True][0] / totals[False][0]:.1%})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-move cost of max-n and paranoid search")
+    parser.add_argument("--players", type=int, default=4)
+    parser.add_argument("--moves", type=int, default=20)
+    parser.add_argument("--depth", type=int, default=8, help="deepest iteration")
+    parser.add_argument("--max-nodes", type=int, default=DEFAULT_MAX_NODES, help="node budget per move")
+    parser.add_argument("--seconds", type=float, default=None, help="time budget per move")
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--compare-depth", type=int, default=4, help="fixed depth for the pruning check")
+    args = parser.parse_args()
+    for mode in args.modes:
+        stats = play_moves(args.players, args.moves, args.depth, args.max_nodes, args.seconds, mode)
+        nodes = [n for n, _, _ in stats]
+        seconds = [s for _, s, _ in stats]
+        depths = [d for _, _, d in stats]
+        print(f"{mode:8s} {args.players} players: {sum(nodes) / len(nodes):8.0f} nodes/move (max {max(nodes)}), "
+              f"{1000 * sum(seconds) / len(seconds):7.1f} ms/move (max {1000 * max(seconds):.1f}), "
+              f"depth {min(depths)}-{max(depths)} (mean {sum(depths) / len(depths):.1f})")
+    compare_pruning(args.players, args.compare_depth)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,291 @@
+"""
+Local move service: suggests an action for a game state over HTTP.
+
+POST /move with a JSON state:
+
+    {"node_type": "decision",            (or "chance": no move to suggest)
+     "current_player": {"id": 0, "position": 6, "balance": 1500,
+                        "in_jail": false, "jail_turns": 0, "properties": [1, 3]},
+     "second_player":  {"id": 1, ...},
+     "houses": {"16": 3, "18": 3},       (optional, 5 is a hotel)
+     "depth": 5,                         (optional, default 5)
+     "engine": "expectimax"}             (optional, or "alphabeta")
+
+and get back the chosen action, every action's values and search stats
+(with alphabeta, only the chosen action's value is exact; the others are
+bounds that show they are no better).
+GET /stats reports request, cache and coalescing counters.
+
+Searches run on a process pool; each worker keeps the opening book and
+evaluation cache open between requests. Requests for a state that is already
+being searched wait for that search instead of starting another, and
+answers are kept in an in-memory LRU cache.
+
+    python move_service.py --port 8765 --workers 4
+    curl -s localhost:8765/move -d @state.json
+"""
+
+import argparse
+import asyncio
+import collections
+import json
+import math
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import alphabeta
+import tree
+from node import Node, winner
+from player import Player
+from property import COLOR_GROUPS, HOTEL, Property, PROPERTY_DEFINITIONS, even_build
+
+ENGINES = ("expectimax", "alphabeta")
+DEFAULT_DEPTH = 5
+MAX_DEPTH = 8
+BOARD_SIZE = 40
+# A third turn in jail always ends it (see node.roll_outcome)
+MAX_JAIL_TURNS = 2
+
+
+class BadRequest(Exception):
+    pass
+
+
+def _integer(state, field, default, low, high):
+    value = state.get(field, default)
+    # bool is an int subclass, but true is no position
+    if isinstance(value, bool) or not isinstance(value, int) or not low <= value <= high:
+        raise BadRequest(f"{field} must be an integer from {low} to {high}")
+    return value
+
+
+def _player_from_state(state):
+    if not isinstance(state, dict):
+        raise BadRequest("players must be JSON objects")
+    balance = state.get("balance", 1500)
+    if isinstance(balance, bool) or not isinstance(balance, (int, float)) or not math.isfinite(balance):
+        raise BadRequest("balance must be a number")
+    in_jail = state.get("in_jail", False)
+    if not isinstance(in_jail, bool):
+        raise BadRequest("in_jail must be true or false")
+    player = Player(_integer(state, "id", None, 0, 1), balance=balance,
+                    position=_integer(state, "position", 0, 0, BOARD_SIZE - 1))
+    player.in_jail = in_jail
+    player.jail_turns = _integer(state, "jail_turns", 0, 0, MAX_JAIL_TURNS)
+    return player
+
+
+def node_from_state(state):
+    """Build a root Node from a JSON state; owners come from the players' property lists"""
+    try:
+        current_player = _player_from_state(state["current_player"])
+        second_player = _player_from_state(state["second_player"])
+        node_type = state.get("node_type", "decision")
+        if {current_player.ID, second_player.ID} != {0, 1}:
+            raise BadRequest("players must have ids 0 and 1")
+        if node_type not in ("decision", "chance"):
+            raise BadRequest("node_type must be 'decision' or 'chance'")
+        owners = {}
+        for player, player_state in ((current_player, state["current_player"]),
+                                     (second_player, state["second_player"])):
+            for position in player_state.get("properties", []):
+                if int(position) in owners:
+                    raise BadRequest(f"both players list property {int(position)}")
+                owners[int(position)] = player
+        houses = {int(position): int(count) for position, count in state.get("houses", {}).items()}
+    except (KeyError, TypeError, ValueError, AttributeError) as e:
+        raise BadRequest(f"malformed state: {e!r}")
+
+    properties = []
+    for position, name, value in PROPERTY_DEFINITIONS:
+        prop = Property(name, value, position)
+        if position in owners:
+            owners.pop(position).acquire(prop)
+        properties.append(prop)
+    if owners:
+        raise BadRequest(f"not purchasable: {sorted(owners)}")
+    players = {current_player.ID: current_player, second_player.ID: second_player}
+    for prop in properties:
+        count = houses.pop(prop.position, 0)
+        # Only whole color groups can be built on
+        if count and (prop.owner is None or prop.group is None or not 0 <= count <= HOTEL or
+                      not players[prop.owner].has_monopoly(prop.position)):
+            raise BadRequest(f"cannot have {count} houses at {prop.position}")
+        prop.set_houses(count)
+    if houses:
+        raise BadRequest(f"cannot have houses at {sorted(houses)}")
+    by_position = {prop.position: prop for prop in properties}
+    for group, (_, positions) in COLOR_GROUPS.items():
+        # Houses are built evenly: no street more than one house ahead
+        built = {position: by_position[position].houses for position in positions}
+        if sorted(built.values()) != sorted(even_build(group, sum(built.values())).values()):
+            raise BadRequest(f"uneven build on {group}: {built}")
+    return Node(properties, current_player, second_player,
+                "chance" if node_type == "chance" else "non-chance", None)
+
+
+def state_of(node):
+    """JSON state of `node`, the inverse of node_from_state"""
+    def player_state(player):
+        return {"id": player.ID, "position": player.position, "balance": player.balance,
+                "in_jail": player.in_jail, "jail_turns": player.jail_turns,
+                "properties": sorted(prop.position for prop in player.properties)}
+    return {"node_type": "chance" if node.node_type == "chance" else "decision",
+            "current_player": player_state(node.current_player),
+            "second_player": player_state(node.second_player),
+            "houses": {str(prop.position): prop.houses for prop in node.properties if prop.houses}}
+
+
+_book = None
+_cache = None
+_stores_opened = False
+
+
+def _open_stores():
+    # Opened once per worker process and reused by every search it runs
+    global _book, _cache, _stores_opened
+    if not _stores_opened:
+        import eval_cache
+        import opening_book
+        if Node.default_evaluation():
+            _book = opening_book.OpeningBook.load()
+            _cache = eval_cache.EvalCache.open()
+        _stores_opened = True
+
+
+def search_state(state, depth, engine):
+    """Run in a worker: search `state` and return the response body"""
+    node = node_from_state(state)
+    start = time.perf_counter()
+    if engine == "alphabeta":
+        search = alphabeta.AlphaBetaSearch(node)
+        search.search(depth)
+        stats = {"nodes": search.nodes}
+        values = {action: child.zero_value for action, child in node.action}
+    else:
+        _open_stores()
+        mono_tree = tree.MonopolyTree(node, book=_book, cache=_cache)
+        mono_tree.search(depth)
+        stats = {"leaves": len(mono_tree.leafs)}
+        values = {action: [child.zero_value, child.one_value] for action, child in node.action}
+    stats.update(engine=engine, depth=depth, seconds=round(time.perf_counter() - start, 6))
+
+    return {"action": node.best_action, "values": values, "stats": stats}
+
+
+class MoveService:
+    def __init__(self, workers=None, cache_size=10_000):
+        # Workers are started lazily, while connections are open; forked ones
+        # would inherit the client sockets and keep them from closing
+        self.pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        self.cache_size = cache_size
+        # (state key, depth, engine) -> response, least recently used first
+        self.cache = collections.OrderedDict()
+        # (state key, depth, engine) -> Future of a search in progress
+        self.in_flight = {}
+        self.counters = collections.Counter()
+
+    async def suggest(self, request):
+        if not isinstance(request, dict):
+            raise BadRequest("expected a JSON object")
+        node = node_from_state(request)
+        if node.node_type == "chance":
+            raise BadRequest("chance node: the next step is a dice roll, not a decision")
+        if winner(node) is not None:
+            raise BadRequest("the game is already over")
+        depth = request.get("depth", DEFAULT_DEPTH)
+        engine = request.get("engine", "expectimax")
+        if not isinstance(depth, int) or not 1 <= depth <= MAX_DEPTH:
+            raise BadRequest(f"depth must be an integer from 1 to {MAX_DEPTH}")
+        if engine not in ENGINES:
+            raise BadRequest(f"engine must be one of {ENGINES}")
+
+        self.counters["requests"] += 1
+        key = (node.state_key(), depth, engine)
+        if key in self.cache:
+            self.counters["cache_hits"] += 1
+            self.cache.move_to_end(key)
+            return dict(self.cache[key], cached=True)
+        if key in self.in_flight:
+            self.counters["coalesced"] += 1
+            return dict(await asyncio.shield(self.in_flight[key]), cached=False)
+
+        self.counters["searches"] += 1
+        future = asyncio.get_running_loop().run_in_executor(self.pool, search_state, state_of(node), depth, engine)
+        self.in_flight[key] = future
+        try:
+            response = await asyncio.shield(future)
+        finally:
+            del self.in_flight[key]
+        self.cache[key] = response
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return dict(response, cached=False)
+
+    async def handle(self, reader, writer):
+        try:
+            request_line = await reader.readline()
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+            method, path, _ = request_line.decode("latin-1").split(" ", 2)
+            body = await reader.readexactly(int(headers.get("content-length", 0)))
+
+            if method == "GET" and path == "/stats":
+                status, response = 200, dict(self.counters, cached_states=len(self.cache),
+                                             in_flight=len(self.in_flight))
+            elif method == "POST" and path == "/move":
+                try:
+                    status, response = 200, await self.suggest(json.loads(body))
+                except (BadRequest, json.JSONDecodeError) as e:
+                    status, response = 400, {"error": str(e)}
+            else:
+                status, response = 404, {"error": f"no route for {method} {path}"}
+        except (ValueError, asyncio.IncompleteReadError):
+            status, response = 400, {"error": "malformed HTTP request"}
+        except Exception as e:
+            # Anything else is our bug; the client still gets an answer
+            status, response = 500, {"error": f"internal error: {e!r}"}
+
+        try:
+            payload = json.dumps(response).encode()
+            reason = {200: "OK", 400: "Bad Request", 404: "Not Found", 500: "Internal Server Error"}[status]
+            writer.write(f"HTTP/1.1 {status} {reason}\r\nContent-Type: application/json\r\n"
+                         f"Content-Length: {len(payload)}\r\nConnection: close\r\n\r\n".encode() + payload)
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def serve(self, host="127.0.0.1", port=8765):
+        server = await asyncio.start_server(self.handle, host, port)
+        print(f"Move service listening on http://{host}:{port}")
+        async with server:
+            await server.serve_forever()
+
+    def close(self):
+        self.pool.shutdown(cancel_futures=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve move suggestions over HTTP")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=None, help="search processes (default: all cores)")
+    parser.add_argument("--cache-size", type=int, default=10_000, help="answers kept in memory")
+    args = parser.parse_args()
+    service = MoveService(args.workers, args.cache_size)
+    try:
+        asyncio.run(service.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.close()
+
+
+if __name__ == "__main__":
+    main()
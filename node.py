@@ -1,6 +1,14 @@
 import collections
 import copy
+import hashlib
+import json
+import os
+import random
+import struct
+import sys
 from board_config import BOARD_LAYOUT
+from player import Player
+from property import COLOR_GROUPS, GROUP_MASKS, HOTEL, even_build, rent_for
 
 # Mapping of board position to property/space name
 POSITION_TO_SPACE = {i: BOARD_LAYOUT[i] for i in range(40)}
@@ -24,8 +32,227 @@ SPECIAL_SPACES = {
 # Purchasable property positions (exclude corners and special spaces)
 PURCHASABLE_POSITIONS = [i for i in range(40) if i not in SPECIAL_SPACES]
 
+# Dice model: two six-sided dice. A roll is (total, doubles); doubles only
+# matter in jail, so outside it the rolls of a total lead to the same child
+# and chance nodes branch on at most the 11 totals (roll_groups).
+DICE_OUTCOMES = [(roll, count / 36) for roll, count in sorted(collections.Counter(
+    (first + second, first == second) for first in range(1, 7) for second in range(1, 7)).items())]
+JAIL_POSITION = 10
+
+# Bumped when the game rules change; stored search values (opening book,
+# evaluation cache) computed under other rules are then discarded
+RULES_VERSION = 4
+
+# Compact codes for decision actions (opening book, array tree store)
+ACTION_CODES = {
+    "buy": 0,
+    "sell": 1,
+    "nothing": 2,
+    "pay_rent": 3,
+    "income_tax_200": 4,
+    "income_tax_percent": 5,
+}
+# build_<group>_<n>: build n more houses, evenly, on a color group the mover owns
+for _group, (_, _positions) in COLOR_GROUPS.items():
+    for _count in range(1, len(_positions) + 1):
+        ACTION_CODES[f"build_{_group}_{_count}"] = len(ACTION_CODES)
+
+# Trades that complete a color group for the mover: take the opponent's
+# streets of the group, paying a percentage of their price
+# (trade_<group>_cash_<percent>) or the mover's streets of another group the
+# opponent then completes (trade_<group>_swap_<group>)
+TRADE_CASH_PERCENTS = (100, 150, 200, 300)
+for _group in COLOR_GROUPS:
+    for _percent in TRADE_CASH_PERCENTS:
+        ACTION_CODES[f"trade_{_group}_cash_{_percent}"] = len(ACTION_CODES)
+    for _given in COLOR_GROUPS:
+        if _given != _group:
+            ACTION_CODES[f"trade_{_group}_swap_{_given}"] = len(ACTION_CODES)
+ACTION_NAMES = {code: name for name, code in ACTION_CODES.items()}
+
+# Build actions offered per decision; each adds one house or completes a
+# level of houses on one group, so branching grows by at most this much
+MAX_BUILD_ACTIONS = 2
+# Trades offered per decision, among those both players' utilities favour
+MAX_TRADE_ACTIONS = 2
+
+# Weights of Node.utility, and the balance at which the search treats the
+# game as won. tune_weights.py writes tuned values to UTILITY_WEIGHTS_PATH;
+# they are only loaded at import from the file named by the
+# MONOPOLY_UTILITY_WEIGHTS environment variable. The game itself is always
+# won at $2000.
+DEFAULT_UTILITY_WEIGHTS = {
+    "rent_multiplier": 10,
+    "low_balance": 200,
+    "low_balance_factor": 10000,
+    "win_threshold": 2000,
+    "monopoly_bonus": 100,
+}
+UTILITY_WEIGHTS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "utility_weights.json")
+UTILITY_WEIGHTS_ENV = "MONOPOLY_UTILITY_WEIGHTS"
+
+
+def load_utility_weights(path=UTILITY_WEIGHTS_PATH):
+    """The default weights, updated with those in `path` if it exists"""
+    weights = dict(DEFAULT_UTILITY_WEIGHTS)
+    if os.path.exists(path):
+        with open(path) as f:
+            weights.update((name, value) for name, value in json.load(f).items()
+                           if name in DEFAULT_UTILITY_WEIGHTS)
+    return weights
+
+
+UTILITY_WEIGHTS = dict(DEFAULT_UTILITY_WEIGHTS)
+if os.environ.get(UTILITY_WEIGHTS_ENV):
+    UTILITY_WEIGHTS = load_utility_weights(os.environ[UTILITY_WEIGHTS_ENV])
+    if UTILITY_WEIGHTS != DEFAULT_UTILITY_WEIGHTS:
+        print(f"Using utility weights from {os.environ[UTILITY_WEIGHTS_ENV]}: {json.dumps(UTILITY_WEIGHTS)}",
+              file=sys.stderr)
+
+
+def set_utility_weights(weights):
+    """Replace the weights in place (missing names fall back to the defaults)"""
+    UTILITY_WEIGHTS.clear()
+    UTILITY_WEIGHTS.update(DEFAULT_UTILITY_WEIGHTS)
+    UTILITY_WEIGHTS.update(weights)
+
+
+# Per-player part of a state key: ID, position, balance, in_jail, jail_turns
+_PLAYER_KEY = struct.Struct('<bbd?b')
+
+
+def roll_dice(rng=random):
+    """Roll two dice: (total, doubles)"""
+    first, second = rng.randint(1, 6), rng.randint(1, 6)
+    return first + second, first == second
+
+
+def roll_outcome(player, roll):
+    """Effect of `player` rolling `roll` = (total, doubles), computed without
+    touching any state.
+
+    Returns (position, balance change, opponent balance change, in_jail,
+    jail_turns). Rolls with equal outcomes lead to identical child states.
+    """
+    total, doubles = roll
+    # Doubles get a player out of jail, moving the total; otherwise no movement.
+    if player.in_jail and not doubles:
+        jail_turns = player.jail_turns + 1
+        if jail_turns >= 3:
+            # Auto-pay fine and leave jail; movement starts next turn
+            fine = 50 if player.balance >= 50 else 0
+            return player.position, -fine, 0, False, 0
+        # No movement this turn while in jail
+        return player.position, 0, 0, True, jail_turns
+
+    # Normal movement
+    position = (player.position + total) % 40  # 40 spaces on board
+    # The card drawn on Chance and Community Chest follows the dice, one of six
+    card = (total - 2) % 6 + 1
+    balance_change = 0
+    opponent_change = 0
+
+    # Passing GO awards $200
+    if position < player.position:
+        balance_change += 200
+
+    # Landing on GO TO JAIL (index 30) sends to JAIL (index 10)
+    if position == 30:
+        return JAIL_POSITION, balance_change, 0, True, 0
+
+    # Landing on Luxury Tax (index 38)
+    elif position == 38:
+        balance_change -= 75
+
+    # Landing on Community Chest (indices 2, 17, 33) - apply based on dice
+    elif position in (2, 17, 33):
+        if card <= 2:
+            balance_change += 100  # Reward
+        elif card <= 4:
+            balance_change -= 50   # Penalty
+        else:  # card in [5, 6]
+            position = 0           # Go to GO
+            balance_change += 200  # Collect $200
+
+    # Landing on Chance (indices 7, 22, 36) - apply special action based on dice
+    elif position in (7, 22, 36):
+        if card == 1:
+            balance_change += 10  # Beauty contest
+        elif card == 2:
+            # Grand opera - collect $50 from every other player
+            balance_change += 50
+            opponent_change -= 50
+        elif card == 3:
+            return JAIL_POSITION, balance_change, 0, True, 0  # Go to jail
+        elif card == 4:
+            position = 24  # Illinois Ave (position 24)
+        elif card == 5:
+            balance_change -= 200  # Pay bank $200
+        elif card == 6:
+            position = 0            # Advance to GO
+            balance_change += 200   # Collect $200
+
+    # Leaving jail on doubles resets the jail turns
+    return position, balance_change, opponent_change, False, 0
+
+
+def _trade_terms(action):
+    """(group taken, group given or None, cash percent) of a trade_ action"""
+    terms = action[len("trade_"):]
+    if "_swap_" in terms:
+        taken, given = terms.split("_swap_")
+        return taken, given, 0
+    taken, percent = terms.split("_cash_")
+    return taken, None, int(percent)
+
+
+def search_terminal(node):
+    """True where the search stops: a bankruptcy or a balance over the win threshold"""
+    threshold = UTILITY_WEIGHTS["win_threshold"]
+    return (node.current_player.balance < 0 or node.second_player.balance < 0 or
+            node.current_player.balance > threshold or node.second_player.balance > threshold)
+
+
+def winner(node):
+    """ID of the player who has won at `node`, or None if the game goes on"""
+    current, second = node.current_player, node.second_player
+    if current.balance > 2000 or second.balance < 0:
+        return current.ID
+    if current.balance < 0 or second.balance > 2000:
+        return second.ID
+    return None
+
+
+def player_utility(player):
+    """One player's Node.utility score, from their own balance and properties"""
+    # Buildings count at what they cost, like the properties themselves
+    property_value = sum(prop.value + prop.houses * prop.house_cost for prop in player.properties)
+    # Whole color groups are worth more than their streets: they can be built on
+    property_value += UTILITY_WEIGHTS["monopoly_bonus"] * player.monopolies
+    rent_earned = player.total_rent()
+
+    rent_multiplier = UTILITY_WEIGHTS["rent_multiplier"]
+    if player.balance < UTILITY_WEIGHTS["low_balance"]:
+        value = property_value + rent_multiplier * rent_earned + UTILITY_WEIGHTS["low_balance_factor"] * player.balance
+    else:
+        value = property_value + rent_multiplier * rent_earned + player.balance
+
+    if Node.rent_flow_turns:
+        import landing
+        value += Node.rent_flow_turns * landing.expected_rent_flow(player)
+    return value
+
 
 class Node:
+    # Opponent turns of expected rent income (landing.py) that utility()
+    # credits to each owned property; 0 leaves the evaluation as it was
+    rent_flow_turns = 0
+
+    @staticmethod
+    def default_evaluation():
+        """True if utility() is the stock evaluation the opening book and cache were filled with"""
+        return UTILITY_WEIGHTS == DEFAULT_UTILITY_WEIGHTS and not Node.rent_flow_turns
+
     def __init__(self, properties, current_player, second_player, node_type, parent):
         self.current_player = current_player
         self.second_player = second_player
@@ -37,6 +264,36 @@ class Node:
         self.zero_value = 0
         self.one_value = 0
         self.round = 0
+        # Dice rolls leading to this node and their combined probability
+        # (children of chance nodes only)
+        self.rolls = ()
+        self.probability = 1.0
+        self._roll_groups = None
+        # After Node.Eval: the mover's best action here, or the likeliest
+        # roll at a chance node - the next step of the principal variation
+        self.best_action = None
+        # True when zero_value/one_value were filled in from stored search
+        # results (opening book, cache) and must not be recomputed by utility()
+        self.known_value = False
+
+    def state_key(self):
+        """Stable 64-bit hash of the game state, identical across runs and processes"""
+        h = hashlib.blake2b(digest_size=8)
+        h.update(b'c' if self.node_type == "chance" else b'd')
+        for player in (self.current_player, self.second_player):
+            h.update(_PLAYER_KEY.pack(player.ID, player.position, float(player.balance),
+                                      player.in_jail, player.jail_turns))
+            h.update(bytes(sorted(prop.position for prop in player.properties)))
+            h.update(b'|')
+        h.update(bytes(255 if prop.owner is None else prop.owner for prop in self.properties))
+        h.update(bytes(prop.houses for prop in self.properties))
+        return int.from_bytes(h.digest(), 'little')
+
+    def detached(self):
+        """Copy of this node's game state with no parent, children or values"""
+        properties, current_player, second_player = copy.deepcopy(
+            (self.properties, self.current_player, self.second_player))
+        return Node(properties, current_player, second_player, self.node_type, None)
 
     def get_property_at_position(self, position, properties):
         """Find property object at given board position"""
@@ -48,31 +305,29 @@ class Node:
         return None
 
     def utility(self):
-        one = self.second_player if self.second_player.ID == 1 else self.current_player
         zero = self.current_player if self.current_player.ID == 0 else self.second_player
-        property_value_zero = sum(
-            prop.value for prop in zero.properties)
-        rent_earned_zero = sum(
-            prop.rent for prop in zero.properties)
-
-        property_value_one = sum(prop.value for prop in one.properties)
-        # calculate the total rent earned by player from properties
-        rent_earned_one = sum(prop.rent for prop in one.properties)
-
-        self.zero_value = property_value_zero + 10 * rent_earned_zero + zero.balance
-        self.one_value = property_value_one + 10 * rent_earned_one + one.balance
-
-        if zero.balance < 200:
-            self.zero_value = property_value_zero + 10 * rent_earned_zero + 10000 * zero.balance
-        if one.balance < 200:
-            self.one_value = property_value_one + 10 * rent_earned_one + 10000 * one.balance
+        one = self.second_player if self.second_player.ID == 1 else self.current_player
+        self.zero_value = player_utility(zero)
+        self.one_value = player_utility(one)
         return self.zero_value, self.one_value
 
+    def zero_sum_utility(self):
+        """Player 0's advantage: the difference of the two utility() scores"""
+        zero_value, one_value = self.utility()
+        return zero_value - one_value
+
     @staticmethod
     def Eval(tree):
+        """Back up leaf utilities to the root of ``tree``.
+
+        Runs to the end even if the tree's cancel token has fired: the token
+        only stops expansion, and scoring the leaves already collected is
+        cheap, so a cancelled search still yields the best values found so far.
+        """
         # First, evaluate all leaf nodes
         for node in tree.leafs:
-            node.utility()
+            if not node.known_value:
+                node.utility()
         
         # Get parents of all leaf nodes
         parent_nodes = set(i.parent for i in tree.leafs if i.parent is not None)
@@ -99,13 +354,15 @@ class Node:
                     continue
                 
                 if node.node_type == "chance":
-                    # CHANCE NODE: Expected value (weighted average)
-                    # For a fair 6-sided die, each outcome has probability 1/6
-                    num_children = len(children)
+                    # CHANCE NODE: Expected value, weighted by the probability
+                    # of each (possibly merged) dice outcome. Normalising by the
+                    # total keeps the average right for a cancelled, partial expansion.
+                    total_probability = sum(child.probability for child in children)
                     
-                    if num_children > 0:
-                        node.zero_value = sum(child.zero_value for child in children) / num_children
-                        node.one_value = sum(child.one_value for child in children) / num_children
+                    if total_probability > 0:
+                        node.zero_value = sum(child.probability * child.zero_value for child in children) / total_probability
+                        node.one_value = sum(child.probability * child.one_value for child in children) / total_probability
+                        node.best_action = max(node.action, key=lambda item: item[1].probability)[0]
                     else:
                         # No children means terminal/error state
                         node.zero_value = 0
@@ -120,7 +377,7 @@ class Node:
                         node.zero_value = max(child.zero_value for child in children)
                         # Player 1's perspective: gets the one_value corresponding to Player 0's best choice
                         # Find which child Player 0 will choose
-                        best_child_for_p0 = max(children, key=lambda c: c.zero_value)
+                        node.best_action, best_child_for_p0 = max(node.action, key=lambda item: item[1].zero_value)
                         node.one_value = best_child_for_p0.one_value
                     
                     else:  # node.current_player.ID == 1
@@ -128,7 +385,7 @@ class Node:
                         node.one_value = max(child.one_value for child in children)
                         # Player 0's perspective: gets the zero_value corresponding to Player 1's best choice
                         # Find which child Player 1 will choose
-                        best_child_for_p1 = max(children, key=lambda c: c.one_value)
+                        node.best_action, best_child_for_p1 = max(node.action, key=lambda item: item[1].one_value)
                         node.zero_value = best_child_for_p1.zero_value
                 
                 # Add this node's parent to the next level (moving up the tree)
@@ -173,152 +430,266 @@ class Node:
         return ans
 
     def get_children(self):
+        """Build every child at once (see iter_children for the lazy version)"""
+        for _ in self.iter_children():
+            pass
+        return self.children
+
+    def best_child(self):
+        """The child best_action leads to, once a search has set it"""
+        return next(child for action, child in self.action if action == self.best_action)
+
+    def iter_children(self, first=None):
+        """Yield children one at a time, building each only when requested.
+
+        A search that stops early (pruning, cache hit, cancellation) never
+        pays for the deep copies of the children it did not reach. The
+        action `first`, if legal, is tried before the others.
+        """
+        actions = list(self.legal_actions())
+        if first in actions:
+            actions.remove(first)
+            actions.insert(0, first)
+        for action in actions:
+            yield self.make_child(action)
+
+    def roll_groups(self):
+        """{representative roll: (rolls, probability, outcome)} for a chance node.
+
+        Rolls that lead to the same state (both rolls of a total outside
+        jail, every roll but doubles in it)
+        are merged into one outcome with their combined probability.
+        """
+        if self._roll_groups is not None:
+            return self._roll_groups
+        groups = {}
+        by_outcome = {}
+        for roll, probability in DICE_OUTCOMES:
+            outcome = roll_outcome(self.current_player, roll)
+            if outcome in by_outcome:
+                representative = by_outcome[outcome]
+                rolls, total, _ = groups[representative]
+                groups[representative] = (rolls + (roll,), total + probability, outcome)
+            else:
+                by_outcome[outcome] = roll
+                groups[roll] = ((roll,), probability, outcome)
+        self._roll_groups = groups
+        return groups
+
+    def child_for_roll(self, roll):
+        """Child of this chance node reached by rolling `roll`.
+
+        Built here if the search did not expand it (a sparse-sampled chance
+        node); children must have been generated first.
+        """
+        for _, child in self.action:
+            if roll in child.rolls:
+                return child
+        if self.action:
+            for action, (rolls, _, _) in self.roll_groups().items():
+                if roll in rolls:
+                    return self.make_child(action)
+        raise KeyError(f"no child for roll {roll}")
+
+    def legal_actions(self):
+        """Yield the labels of the moves available here, without copying any state"""
         if self.node_type == "chance":
-            for i in range(1, 7):
-                cp_properties = copy.deepcopy(self.properties)
-                cp_current_player = copy.deepcopy(self.current_player)
-                cp_second_player = copy.deepcopy(self.second_player)
-
-                # Handle jail turns deterministically: no movement while in jail.
-                if cp_current_player.in_jail:
-                    cp_current_player.jail_turns += 1
-                    if cp_current_player.jail_turns >= 3:
-                        # Auto-pay fine and leave jail; movement starts next turn
-                        if cp_current_player.balance >= 50:
-                            cp_current_player.balance -= 50
-                        cp_current_player.in_jail = False
-                        cp_current_player.jail_turns = 0
-                    # No movement this turn while in jail
-                else:
-                    # Normal movement
-                    old_position = cp_current_player.position
-                    cp_current_player.position = (cp_current_player.position + i) % 40  # 40 spaces on board
+            # One action per distinct outcome, labelled by its lowest roll
+            yield from self.roll_groups()
+            return
 
-                    # Passing GO awards $200
-                    if cp_current_player.position < old_position:
-                        cp_current_player.balance += 200
+        # Decision node - handle current position
+        current_pos = self.current_player.position
 
-                    # Landing on GO TO JAIL (index 30) sends to JAIL (index 10)
-                    if cp_current_player.position == 30:
-                        cp_current_player.go_to_jail()
-                    
-                    # Landing on Luxury Tax (index 38)
-                    elif cp_current_player.position == 38:
-                        cp_current_player.balance -= 75
-                    
-                    # Landing on Community Chest (indices 2, 17, 33) - apply based on dice
-                    elif cp_current_player.position in [2, 17, 33]:
-                        if i <= 2:
-                            cp_current_player.balance += 100  # Reward
-                        elif i <= 4:
-                            cp_current_player.balance -= 50   # Penalty
-                        else:  # i in [5, 6]
-                            cp_current_player.position = 0    # Go to GO
-                            cp_current_player.balance += 200   # Collect $200
-                    
-                    # Landing on Chance (indices 7, 22, 36) - apply special action based on dice
-                    elif cp_current_player.position in [7, 22, 36]:
-                        if i == 1:
-                            cp_current_player.balance += 10  # Beauty contest
-                        elif i == 2:
-                            # Grand opera - collect $50 from every other player
-                            cp_current_player.balance += 50
-                            cp_second_player.balance -= 50
-                        elif i == 3:
-                            cp_current_player.go_to_jail()  # Go to jail
-                        elif i == 4:
-                            cp_current_player.position = 24  # Illinois Ave (position 24)
-                        elif i == 5:
-                            cp_current_player.balance -= 200  # Pay bank $200
-                        elif i == 6:
-                            cp_current_player.position = 0    # Advance to GO
-                            cp_current_player.balance += 200   # Collect $200
-
-                new_node = Node(cp_properties, cp_current_player, cp_second_player, node_type="non-chance", parent=self)
-                self.action.append((i, new_node))
-                self.children.append(new_node)
+        # Income Tax decision
+        if current_pos == 4:  # Income Tax
+            yield "income_tax_200"
+            yield "income_tax_percent"
+            return
+
+        current_property = None
+        if current_pos in PURCHASABLE_POSITIONS:
+            current_property = self.get_property_at_position(current_pos, self.properties)
+
+        if current_property is not None:
+            # Check if on opponent's property - RENT IS MANDATORY, no other options
+            if current_property.owner is not None and current_property.owner != self.current_player.ID:
+                yield "pay_rent"
+                return
+            # Buy option
+            if current_property.owner is None and self.current_player.balance >= current_property.value:
+                yield "buy"
+            # Sell option (not while its color group has buildings)
+            if current_property.owner == self.current_player.ID and not self._group_houses(current_property.group):
+                yield "sell"
+
+        # Do nothing (only available if NOT on opponent's property)
+        yield "nothing"
+
+        yield from self.build_actions()
+        yield from self.trade_actions()
+
+    def _group_houses(self, group):
+        if group is None:
+            return 0
+        return sum(prop.houses for prop in self.properties if prop.group == group)
+
+    def build_actions(self):
+        """Up to MAX_BUILD_ACTIONS build labels for the mover, best rent gain per dollar first.
+
+        Only monopolies can be built on, houses go up evenly in canonical
+        order, and each group offers just two sizes - one more house, or the
+        rest of the current level - so equivalent builds are never repeated.
+        """
+        mover = self.current_player
+        by_group = collections.defaultdict(list)
+        for prop in self.properties:
+            if prop.group is not None:
+                by_group[prop.group].append(prop)
+        candidates = []
+        for group, (house_cost, positions) in COLOR_GROUPS.items():
+            streets = by_group[group]
+            if any(prop.owner != mover.ID for prop in streets):
+                continue
+            built = sum(prop.houses for prop in streets)
+            if built == HOTEL * len(positions):
+                continue
+            rent = sum(mover.rent_due(prop) for prop in streets)
+            for count in sorted({1, len(positions) - built % len(positions)}):
+                cost = count * house_cost
+                if cost > mover.balance:
+                    continue
+                after = even_build(group, built + count)
+                gain = sum(rent_for(prop.value, prop.position, after[prop.position]) for prop in streets) - rent
+                candidates.append((-gain / cost, len(candidates), f"build_{group}_{count}"))
+        for _, _, action in sorted(candidates)[:MAX_BUILD_ACTIONS]:
+            yield action
+
+    def trade_actions(self):
+        """Up to MAX_TRADE_ACTIONS trades for the mover, best for them first.
+
+        Only groups split between the two players with no unowned street are
+        traded for, so every candidate completes a group for the mover; at
+        most 8 x (4 cash offers + 7 swaps) exist and few apply. A candidate is
+        kept only if it raises the utility of both players, as an opponent
+        would only accept a trade that helps them, and does not end the game.
+        """
+        mover, opponent = self.current_player, self.second_player
+        owned = mover.owned_mask | opponent.owned_mask
+        split = [group for group, mask in GROUP_MASKS.items()
+                 if owned & mask == mask and mover.owned_mask & mask and opponent.owned_mask & mask]
+        if not split:
+            return
+        mover_before, opponent_before = player_utility(mover), player_utility(opponent)
+        candidates = []
+        for taken_group in split:
+            taken = [prop for prop in opponent.properties if prop.group == taken_group]
+            offers = [(f"trade_{taken_group}_cash_{percent}", None, int(sum(prop.value for prop in taken) * percent / 100))
+                      for percent in TRADE_CASH_PERCENTS]
+            offers += [(f"trade_{taken_group}_swap_{given_group}", given_group, 0)
+                       for given_group in split if given_group != taken_group]
+            for action, given_group, cash in offers:
+                if cash > mover.balance:
+                    continue
+                given = [prop for prop in mover.properties if given_group is not None and prop.group == given_group]
+                # Scored on throwaway players; the real ones are untouched
+                after_mover = Player(mover.ID, mover.balance - cash, mover.position,
+                                     [prop for prop in mover.properties if prop not in given] + taken)
+                after_opponent = Player(opponent.ID, opponent.balance + cash, opponent.position,
+                                        [prop for prop in opponent.properties if prop not in taken] + given)
+                # Paying the opponent past the win threshold is no trade
+                if after_opponent.balance > UTILITY_WEIGHTS["win_threshold"]:
+                    continue
+                mover_gain = player_utility(after_mover) - mover_before
+                if mover_gain > 0 and player_utility(after_opponent) > opponent_before:
+                    candidates.append((-mover_gain, len(candidates), action))
+        for _, _, action in sorted(candidates)[:MAX_TRADE_ACTIONS]:
+            yield action
+
+    def _copy_state(self):
+        return (copy.deepcopy(self.properties),
+                copy.deepcopy(self.current_player),
+                copy.deepcopy(self.second_player))
+
+    def make_child(self, action):
+        """Build the child reached by `action`, attach it to this node and return it"""
+        cp_properties, cp_current_player, cp_second_player = self._copy_state()
+
+        if self.node_type == "chance":
+            rolls, probability, outcome = self.roll_groups()[action]
+            position, balance_change, opponent_change, in_jail, jail_turns = outcome
+            cp_current_player.position = position
+            cp_current_player.balance += balance_change
+            cp_second_player.balance += opponent_change
+            cp_current_player.in_jail = in_jail
+            cp_current_player.jail_turns = jail_turns
+
+            # The same player moves on to decide at the square they landed on
+            new_node = Node(cp_properties, cp_current_player, cp_second_player, node_type="non-chance", parent=self)
+            new_node.rolls = rolls
+            new_node.probability = probability
 
         else:
-            # Decision node - handle current position
-            current_pos = self.current_player.position
-            space_name = POSITION_TO_SPACE.get(current_pos)
-            
-            # Income Tax decision
-            if current_pos == 4:  # Income Tax
+            if action == "income_tax_200":
                 # Option 1: Pay $200
-                cp_properties_tax1 = copy.deepcopy(self.properties)
-                cp_current_player_tax1 = copy.deepcopy(self.current_player)
-                cp_second_player_tax1 = copy.deepcopy(self.second_player)
-                cp_current_player_tax1.balance -= 200
-                new_node_tax1 = Node(cp_properties_tax1, cp_second_player_tax1, cp_current_player_tax1, node_type="chance", parent=self)
-                self.action.append(("income_tax_200", new_node_tax1))
-                self.children.append(new_node_tax1)
-                
+                cp_current_player.balance -= 200
+
+            elif action == "income_tax_percent":
                 # Option 2: Pay 10% of net worth (whichever is cheaper)
-                cp_properties_tax2 = copy.deepcopy(self.properties)
-                cp_current_player_tax2 = copy.deepcopy(self.current_player)
-                cp_second_player_tax2 = copy.deepcopy(self.second_player)
-                net_worth = cp_current_player_tax2.balance + sum(prop.value for prop in cp_current_player_tax2.properties)
+                net_worth = cp_current_player.balance + sum(
+                    prop.value + prop.houses * prop.house_cost for prop in cp_current_player.properties)
                 tax_amount = int(net_worth * 0.1)
-                tax_to_pay = min(200, tax_amount)
-                cp_current_player_tax2.balance -= tax_to_pay
-                new_node_tax2 = Node(cp_properties_tax2, cp_second_player_tax2, cp_current_player_tax2, node_type="chance", parent=self)
-                self.action.append(("income_tax_percent", new_node_tax2))
-                self.children.append(new_node_tax2)
-            
-            else:
-                # Buy option
-                cp_properties_buy = copy.deepcopy(self.properties)
-                cp_current_player_buy = copy.deepcopy(self.current_player)
-                cp_second_player_buy = copy.deepcopy(self.second_player)
-                
-                if current_pos in PURCHASABLE_POSITIONS:
-                    current_property = self.get_property_at_position(current_pos, cp_properties_buy)
-                    if current_property and current_property.owner is None and cp_current_player_buy.balance >= current_property.value:
-                        cp_current_player_buy.buy(current_property)
-                        new_node = Node(cp_properties_buy, cp_second_player_buy, cp_current_player_buy, node_type="chance", parent=self)
-                        self.action.append(("buy", new_node))
-                        self.children.append(new_node)
-                
-                # Sell option
-                cp_properties_sell = copy.deepcopy(self.properties)
-                cp_current_player_sell = copy.deepcopy(self.current_player)
-                cp_second_player_sell = copy.deepcopy(self.second_player)
-                
-                if current_pos in PURCHASABLE_POSITIONS:
-                    current_property = self.get_property_at_position(current_pos, cp_properties_sell)
-                    if current_property and current_property.owner == cp_current_player_sell.ID:
-                        cp_current_player_sell.sell(current_property)
-                        new_node = Node(cp_properties_sell, cp_second_player_sell, cp_current_player_sell, node_type="chance", parent=self)
-                        self.action.append(("sell", new_node))
-                        self.children.append(new_node)
-                
-                # Check if on opponent's property - RENT IS MANDATORY
-                if current_pos in PURCHASABLE_POSITIONS:
-                    current_property = self.get_property_at_position(current_pos, self.properties)
-                    if current_property and current_property.owner is not None and current_property.owner != self.current_player.ID:
-                        # MANDATORY: Pay rent to the property owner
-                        cp_properties_rent = copy.deepcopy(self.properties)
-                        cp_current_player_rent = copy.deepcopy(self.current_player)
-                        cp_second_player_rent = copy.deepcopy(self.second_player)
-                        
-                        # Owner is always the second_player (since owner != current_player)
-                        rent_amount = current_property.rent
-                        cp_current_player_rent.balance -= rent_amount
-                        cp_second_player_rent.balance += rent_amount
-                        
-                        new_node = Node(cp_properties_rent, cp_second_player_rent, cp_current_player_rent, node_type="chance", parent=self)
-                        self.action.append(("pay_rent", new_node))
-                        self.children.append(new_node)
-                        # Return early - rent is mandatory, no other options
-                        return self.children
-                
-                # Do nothing (only available if NOT on opponent's property)
-                cp_properties_nothing = copy.deepcopy(self.properties)
-                cp_current_player_nothing = copy.deepcopy(self.current_player)
-                cp_second_player_nothing = copy.deepcopy(self.second_player)
-                new_node = Node(cp_properties_nothing, cp_second_player_nothing, cp_current_player_nothing, node_type="chance", parent=self)
-                self.action.append(("nothing", new_node))
-                self.children.append(new_node)
+                cp_current_player.balance -= min(200, tax_amount)
 
-        return self.children
+            elif action == "buy":
+                current_property = self.get_property_at_position(cp_current_player.position, cp_properties)
+                cp_current_player.buy(current_property)
+
+            elif action == "sell":
+                current_property = self.get_property_at_position(cp_current_player.position, cp_properties)
+                cp_current_player.sell(current_property)
+
+            elif action.startswith("build_"):
+                group, _, count = action[len("build_"):].rpartition("_")
+                built = self._group_houses(group) + int(count)
+                houses = even_build(group, built)
+                # Board and player hold separate copies of each property
+                for prop in cp_properties + cp_current_player.properties:
+                    if prop.position in houses:
+                        prop.set_houses(houses[prop.position])
+                cp_current_player.balance -= int(count) * COLOR_GROUPS[group][0]
+
+            elif action.startswith("trade_"):
+                taken_group, given_group, percent = _trade_terms(action)
+                taken = [prop for prop in cp_second_player.properties if prop.group == taken_group]
+                given = [prop for prop in cp_current_player.properties
+                         if given_group is not None and prop.group == given_group]
+                cash = int(sum(prop.value for prop in taken) * percent / 100)
+                for prop in taken:
+                    cp_second_player.release(prop)
+                    cp_current_player.acquire(prop)
+                for prop in given:
+                    cp_current_player.release(prop)
+                    cp_second_player.acquire(prop)
+                cp_current_player.balance -= cash
+                cp_second_player.balance += cash
+                # Board and player hold separate copies of each property
+                owners = {prop.position: prop.owner for prop in taken + given}
+                for prop in cp_properties:
+                    if prop.position in owners:
+                        prop.owner = owners[prop.position]
+
+            elif action == "pay_rent":
+                # MANDATORY: Pay rent to the property owner
+                # Owner is always the second_player (since owner != current_player)
+                current_property = self.get_property_at_position(cp_current_player.position, self.properties)
+                rent_amount = cp_second_player.rent_due(current_property)
+                cp_current_player.balance -= rent_amount
+                cp_second_player.balance += rent_amount
+
+            # After the decision the turn passes: the opponent rolls next
+            new_node = Node(cp_properties, cp_second_player, cp_current_player, node_type="chance", parent=self)
+
+        self.action.append((action, new_node))
+        self.children.append(new_node)
+        return new_node
@@ -0,0 +1,172 @@
+"""
+Opening book for the fixed start position.
+
+Every game starts from the same root, so the decisions of the first few turns
+can be searched offline to a high depth and looked up during play instead of
+being searched again. The book is a flat binary file of fixed-size records
+sorted by state key, memory-mapped and binary-searched at lookup time.
+
+Build it with:
+    python opening_book.py --turns 3 --depth 7
+"""
+
+import argparse
+import copy
+import mmap
+import os
+import struct
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import property
+import tree
+from node import Node, ACTION_CODES, ACTION_NAMES, RULES_VERSION
+from player import Player
+
+DEFAULT_BOOK_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "opening_book.bin")
+
+# Header: magic, number of records, search depth used to build the book
+HEADER = struct.Struct('<8sII')
+# The last digits are the rules version the book was searched under
+MAGIC = b'MBOOK%03d' % RULES_VERSION
+# Record: state key, action code, zero_value, one_value
+RECORD = struct.Struct('<QB3xff')
+
+
+class OpeningBook:
+    """Read-only, memory-mapped view of an opening book file"""
+
+    def __init__(self, path=DEFAULT_BOOK_PATH):
+        self.path = path
+        self._file = open(path, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.count, self.depth = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            self.close()
+            if magic.startswith(b'MBOOK'):
+                raise ValueError(f"{path} was built for other game rules; rebuild it")
+            raise ValueError(f"{path} is not an opening book file")
+
+    @classmethod
+    def load(cls, path=DEFAULT_BOOK_PATH):
+        """Open the book at `path`, or return None if it has not been built"""
+        if not os.path.exists(path):
+            return None
+        try:
+            return cls(path)
+        except ValueError as e:
+            print(f"Opening book disabled: {e}")
+            return None
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+    def __len__(self):
+        return self.count
+
+    def _key_at(self, index):
+        return struct.unpack_from('<Q', self._map, HEADER.size + index * RECORD.size)[0]
+
+    def lookup(self, node):
+        """{action: (zero_value, one_value)} for a decision node, or None if not in the book"""
+        if node.node_type == "chance":
+            return None
+        key = node.state_key()
+
+        # Binary search for the first record with this key
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key_at(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+
+        entry = {}
+        index = lo
+        while index < self.count:
+            record_key, code, zero_value, one_value = RECORD.unpack_from(
+                self._map, HEADER.size + index * RECORD.size)
+            if record_key != key:
+                break
+            entry[ACTION_NAMES[code]] = (zero_value, one_value)
+            index += 1
+        return entry or None
+
+
+def write_book(path, entries, depth):
+    """Write {state_key: {action: (zero_value, one_value)}} as a sorted book file"""
+    records = sorted(
+        (key, ACTION_CODES[action], zero_value, one_value)
+        for key, actions in entries.items()
+        for action, (zero_value, one_value) in actions.items()
+    )
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, len(records), depth))
+        for record in records:
+            f.write(RECORD.pack(*record))
+    os.replace(tmp_path, path)
+    return len(records)
+
+
+def start_node():
+    """The root every game starts from"""
+    properties = copy.deepcopy(property.properties)
+    for prop in properties:
+        prop.owner = None
+    return Node(properties, Player(0), Player(1), "non-chance", None)
+
+
+def opening_positions(turns):
+    """Distinct decision nodes reachable from the start within `turns` turns"""
+    positions = {}
+    frontier = [start_node()]
+    # One turn is a decision ply followed by a dice ply
+    for ply in range(2 * turns):
+        next_frontier = []
+        for node in frontier:
+            if node.node_type != "chance":
+                key = node.state_key()
+                if key in positions:
+                    continue
+                positions[key] = node.detached()
+            next_frontier.extend(node.get_children())
+        frontier = next_frontier
+    return list(positions.values())
+
+
+def search_position(node, depth):
+    """Deep-search one position; returns (state_key, {action: (zero, one)})"""
+    mono_tree = tree.MonopolyTree(node)
+    mono_tree.search(depth)
+    actions = {action: (child.zero_value, child.one_value)
+               for action, child in node.action if action in ACTION_CODES}
+    return node.state_key(), actions
+
+
+def build_opening_book(path=DEFAULT_BOOK_PATH, turns=3, depth=7, workers=None):
+    positions = opening_positions(turns)
+    print(f"Searching {len(positions)} opening positions to depth {depth}...")
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = pool.map(search_position, positions, [depth] * len(positions), chunksize=4)
+        entries = {key: actions for key, actions in results if actions}
+    count = write_book(path, entries, depth)
+    print(f"Wrote {count} records for {len(entries)} positions to {path} "
+          f"in {time.perf_counter() - start:.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the opening book for the fixed start position")
+    parser.add_argument("--turns", type=int, default=3, help="turns from the start to cover")
+    parser.add_argument("--depth", type=int, default=7, help="search depth for each book position")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--output", default=DEFAULT_BOOK_PATH, help="book file to write")
+    args = parser.parse_args()
+    build_opening_book(args.output, args.turns, args.depth, args.workers)
+
+
+if __name__ == "__main__":
+    main()
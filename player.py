@@ -6,6 +6,13 @@ class Player:
         self.balance = balance
         self.position = position
         self.properties: list[property.Property] = properties or []
+        # Bit p set for each owned board position p, and the union of the
+        # color groups owned outright; kept up to date by acquire() and sell()
+        self.owned_mask = 0
+        self.monopoly_mask = 0
+        self.monopolies = 0
+        for prop in self.properties:
+            self._update_masks(prop.position, True)
         self.ID = player_id
         self.in_jail = False
         self.jail_turns = 0
@@ -21,17 +28,58 @@ class Player:
         self.balance -= amount
         recipient.balance += amount
 
-    def buy(self, property):
-        self.balance -= property.value
+    def _update_masks(self, position, owned):
+        bit = 1 << position
+        self.owned_mask = self.owned_mask | bit if owned else self.owned_mask & ~bit
+        group = property.GROUP_OF.get(position)
+        if group is None:
+            return
+        group_mask = property.GROUP_MASKS[group]
+        complete = self.owned_mask & group_mask == group_mask
+        if complete != bool(self.monopoly_mask & bit):
+            self.monopoly_mask ^= group_mask
+            self.monopolies += 1 if complete else -1
+
+    def has_monopoly(self, position):
+        """True if the player owns every street of the color group at `position`"""
+        return bool(self.monopoly_mask >> position & 1)
+
+    def rent_due(self, prop):
+        """Rent for landing on `prop`, owned by this player: double on an
+        unimproved street whose whole color group they own"""
+        if prop.houses == 0 and self.monopoly_mask >> prop.position & 1:
+            return 2 * prop.rent
+        return prop.rent
+
+    def total_rent(self):
+        """Sum of rent_due() over the player's properties"""
+        rent = sum(prop.rent for prop in self.properties)
+        if self.monopoly_mask:
+            rent += sum(prop.rent for prop in self.properties
+                        if prop.houses == 0 and self.monopoly_mask >> prop.position & 1)
+        return rent
+
+    def acquire(self, property):
+        """Take ownership of `property` without paying for it"""
         self.properties.append(property)
         property.owner = self.ID
+        self._update_masks(property.position, True)
+
+    def release(self, property):
+        """Give up ownership of `property` (one of self.properties) without payment"""
+        self.properties.remove(property)
+        property.owner = None
+        self._update_masks(property.position, False)
+
+    def buy(self, property):
+        self.balance -= property.value
+        self.acquire(property)
 
     def sell(self, property):
         # try:
             for item in self.properties:
                 if item.position == property.position:
-                    self.properties.remove(item)
-                    item.owner = None
+                    self.release(item)
                     self.balance += (item.value * .9)
         #
         # except:
@@ -10,6 +10,73 @@ class Property:
         self.tax = 0
         self.rent = value * 0.1
         self.owner = None
+        # Streets of a color group can be built on: 1-4 houses, 5 = hotel
+        self.group = GROUP_OF.get(position)
+        self.house_cost = COLOR_GROUPS[self.group][0] if self.group else 0
+        self.houses = 0
+
+    def set_houses(self, houses):
+        self.houses = houses
+        self.rent = rent_for(self.value, self.position, houses)
+
+
+# Color groups: name -> (cost of a house, streets in canonical build order).
+# Houses go up evenly, most expensive street first, so the houses on a group
+# are fully described by their number (see even_build).
+COLOR_GROUPS = {
+    "brown": (50, (3, 1)),
+    "light_blue": (50, (9, 8, 6)),
+    "pink": (100, (14, 13, 11)),
+    "orange": (100, (19, 18, 16)),
+    "red": (150, (24, 23, 21)),
+    "yellow": (150, (29, 27, 26)),
+    "green": (200, (34, 32, 31)),
+    "dark_blue": (200, (39, 37)),
+}
+GROUP_OF = {position: group for group, (_, positions) in COLOR_GROUPS.items() for position in positions}
+# Bit p set for each board position p of the group, to test monopolies
+# against Player.owned_mask with one AND
+GROUP_MASKS = {group: sum(1 << position for position in positions) for group, (_, positions) in COLOR_GROUPS.items()}
+HOTEL = 5
+
+# Rent with 1, 2, 3 and 4 houses and with a hotel (the standard Monopoly
+# tables); streets without buildings keep the game's flat 10% of value
+RENT_TABLES = {
+    1: (10, 30, 90, 160, 250),
+    3: (20, 60, 180, 320, 450),
+    6: (30, 90, 270, 400, 550),
+    8: (30, 90, 270, 400, 550),
+    9: (40, 100, 300, 450, 600),
+    11: (50, 150, 450, 625, 750),
+    13: (50, 150, 450, 625, 750),
+    14: (60, 180, 500, 700, 900),
+    16: (70, 200, 550, 750, 950),
+    18: (70, 200, 550, 750, 950),
+    19: (80, 220, 600, 800, 1000),
+    21: (90, 250, 700, 875, 1050),
+    23: (90, 250, 700, 875, 1050),
+    24: (100, 300, 750, 925, 1100),
+    26: (110, 330, 800, 975, 1150),
+    27: (110, 330, 800, 975, 1150),
+    29: (120, 360, 850, 1025, 1200),
+    31: (130, 390, 900, 1100, 1275),
+    32: (130, 390, 900, 1100, 1275),
+    34: (150, 450, 1000, 1200, 1400),
+    37: (175, 500, 1100, 1300, 1500),
+    39: (200, 600, 1400, 1700, 2000),
+}
+
+
+def rent_for(value, position, houses):
+    """Rent of the property at `position` worth `value` with `houses` built"""
+    return value * 0.1 if houses == 0 else RENT_TABLES[position][houses - 1]
+
+
+def even_build(group, houses):
+    """{position: houses} for `houses` built evenly on `group`, in canonical order"""
+    positions = COLOR_GROUPS[group][1]
+    level, extra = divmod(houses, len(positions))
+    return {position: level + (1 if index < extra else 0) for index, position in enumerate(positions)}
 
 
 # Property definitions matching actual board positions from BOARD_LAYOUT
@@ -54,13 +121,19 @@ PROPERTY_DEFINITIONS = [
 
 properties = []
 
-# Randomly select 5 properties to have tax
-property_names_for_tax = [p[1] for p in PROPERTY_DEFINITIONS]
-properties_with_tax = random.sample(property_names_for_tax, 5)
-
 # Create property objects with correct board positions
 for position, name, value in PROPERTY_DEFINITIONS:
-    property_obj = Property(name, value, position)
-    if name in properties_with_tax:
-        property_obj.tax = random.randint(10, 50)
-    properties.append(property_obj)
+    properties.append(Property(name, value, position))
+
+
+def assign_random_taxes(props=None, count=5):
+    """Randomly select `count` properties to have tax.
+
+    Called when a game starts rather than at import time, so importing the
+    engine stays cheap and deterministic.
+    """
+    props = properties if props is None else props
+    for prop in props:
+        prop.tax = 0
+    for prop in random.sample(props, count):
+        prop.tax = random.randint(10, 50)
@@ -0,0 +1,114 @@
+"""
+Quiescence extensions for volatile leaves.
+
+A search stopped at a fixed depth scores leaves whose value is about to jump:
+a rent that must still be paid, an income-tax choice not yet made, or a
+player about to roll with a balance just above (or already under)
+Node.utility's low-balance threshold, where the penalty factor multiplies
+every dollar a roll costs, or a purchase that would cross that threshold.
+MonopolyTree(root, quiescence=N) keeps expanding such leaves, up to N plies
+past the nominal depth, until they are quiet. A shallower base depth with
+extensions then makes the same decisions as a deeper fixed-depth search
+with fewer leaves.
+
+Compare with fixed-depth searches:
+    python quiescence.py --depths 3 4 --extensions 2 --reference-depth 7
+"""
+
+import argparse
+import time
+
+from node import PURCHASABLE_POSITIONS, UTILITY_WEIGHTS
+
+# A roll can cost up to $200 (Chance), so balances this close above the
+# low-balance threshold may fall through it on the next roll
+QUIESCENCE_MARGIN = 200
+INCOME_TAX = 4
+
+
+def volatile(node):
+    """True if `node`'s utility is likely to change sharply within a ply"""
+    player = node.current_player
+    if node.node_type == "chance":
+        low_balance = UTILITY_WEIGHTS["low_balance"]
+        # Below the threshold every dollar counts low_balance_factor times over
+        return 0 <= player.balance < low_balance + QUIESCENCE_MARGIN
+    if player.position == INCOME_TAX:
+        return True
+    if player.position in PURCHASABLE_POSITIONS:
+        prop = node.get_property_at_position(player.position, node.properties)
+        if prop is None:
+            return False
+        if prop.owner is None:
+            # A purchase that would take the balance across the threshold
+            low_balance = UTILITY_WEIGHTS["low_balance"]
+            return player.balance - prop.value < low_balance <= player.balance
+        # Mandatory rent still to pay
+        return prop.owner != player.ID
+    return False
+
+
+def sample_positions(count, seed=0):
+    """Decision nodes with a real choice, from games played by a random policy"""
+    import random
+    from node import roll_dice, winner
+    from opening_book import start_node
+
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < count:
+        node = start_node()
+        while winner(node) is None and len(positions) < count:
+            if node.node_type == "chance":
+                node.get_children()
+                node = node.child_for_roll(roll_dice(rng)).detached()
+                continue
+            actions = list(node.legal_actions())
+            if len(actions) > 1 and rng.random() < 0.1:
+                positions.append(node.detached())
+            node = node.make_child(rng.choice(actions)).detached()
+    return positions
+
+
+def benchmark(depths=(3, 4), extensions=2, reference_depth=7, fixed_depth=5, positions=40):
+    import tree
+
+    roots = sample_positions(positions)
+    reference = []
+    for root in roots:
+        mono_tree = tree.MonopolyTree(root.detached())
+        mono_tree.search(reference_depth)
+        reference.append((mono_tree.result.best_action, mono_tree.result.mover_values()))
+    print(f"{len(roots)} positions, against a fixed depth-{reference_depth} search:")
+
+    configurations = [(fixed_depth, 0)] + [(depth, q) for depth in depths for q in (0, extensions)]
+    for depth, quiescence in configurations:
+        agree = leaves = 0
+        error = []
+        start = time.perf_counter()
+        for root, (expected, expected_values) in zip(roots, reference):
+            mono_tree = tree.MonopolyTree(root.detached(), quiescence=quiescence)
+            mono_tree.search(depth)
+            leaves += len(mono_tree.leafs)
+            agree += mono_tree.result.best_action == expected
+            values = mono_tree.result.mover_values()
+            error += [abs(values[action] - value) for action, value in expected_values.items()]
+        elapsed = time.perf_counter() - start
+        print(f"    depth {depth} + up to {quiescence} extension plies: {agree}/{len(roots)} same action, "
+              f"value error {sum(error) / len(error):8.0f}, {leaves / len(roots):6.1f} leaves/move, "
+              f"{1000 * elapsed / len(roots):6.1f} ms/move")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Quiescence-extended searches against fixed-depth ones")
+    parser.add_argument("--depths", type=int, nargs="+", default=[3, 4], help="base depths to extend")
+    parser.add_argument("--extensions", type=int, default=2, help="extension plies allowed past the base depth")
+    parser.add_argument("--reference-depth", type=int, default=7)
+    parser.add_argument("--fixed-depth", type=int, default=5, help="fixed-depth search to compare against")
+    parser.add_argument("--positions", type=int, default=40)
+    args = parser.parse_args()
+    benchmark(args.depths, args.extensions, args.reference_depth, args.fixed_depth, args.positions)
+
+
+if __name__ == "__main__":
+    main()
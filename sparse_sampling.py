@@ -0,0 +1,206 @@
+"""
+Sparse sampling of chance nodes for deeper searches.
+
+A full chance node branches on every distinct dice outcome, so the tree
+grows by about 6x every second ply. With a SparseSampler, MonopolyTree
+expands only k dice rolls drawn at each chance node - k taken from a
+schedule that shrinks with depth - and averages over them, each sampled
+outcome weighted by how often it was drawn. Chance nodes with no more
+outcomes than k (e.g. in jail) are still expanded exactly.
+
+The rolls drawn at a chance node depend only on the seed, the searched
+root's state and the rolls drawn above it, never on the decisions taken, so
+sibling actions are compared under the same dice (common random numbers)
+while each new position gets fresh ones. After the search, variances()
+estimates the sampling variance of each root action's values by propagating
+the spread of the sampled outcomes up the tree. A level that draws a single
+roll has no spread to measure, so its spread is taken from the utilities
+right after each possible roll instead:
+
+    sampler = SparseSampler((3, 2, 1))
+    tree.MonopolyTree(root, sampler=sampler).search(8)
+    sampler.variances(root)     # {action: (variance of zero_value, of one_value)}
+
+Compare with a full search at depth 5:
+    python sparse_sampling.py --depths 8 10
+"""
+
+import argparse
+import random
+import statistics
+import time
+
+import tree
+from node import DICE_OUTCOMES, player_utility
+
+DEFAULT_SCHEDULE = (3, 2, 1)
+
+_ROLLS = [roll for roll, _ in DICE_OUTCOMES]
+_WEIGHTS = [probability for _, probability in DICE_OUTCOMES]
+
+
+class SparseSampler:
+    """Draws the dice rolls a MonopolyTree expands at its chance nodes.
+
+    `schedule[i]` is the number of rolls drawn at the chance nodes with i
+    chance nodes above them; the last entry applies to every deeper level.
+    """
+
+    def __init__(self, schedule=DEFAULT_SCHEDULE, seed=0):
+        if not schedule or min(schedule) < 1:
+            raise ValueError("the sample schedule needs at least one roll per level")
+        self.schedule = tuple(schedule)
+        self.seed = seed
+        # Sampled chance node -> number of rolls drawn there
+        self.draws = {}
+        # State key of the root being searched, part of every draw's seed
+        self.root_key = None
+
+    def start(self, root):
+        """Called by MonopolyTree.search before it expands `root`"""
+        # Only this search's sampled nodes are needed for its variances
+        self.draws.clear()
+        self.root_key = root.state_key()
+
+    def samples(self, level):
+        return self.schedule[min(level, len(self.schedule) - 1)]
+
+    def children(self, node, dice):
+        """Yield (child, dice path of the child) for chance node `node`, reached
+        through the sampled rolls `dice`; the children are built one at a time"""
+        groups = node.roll_groups()
+        k = self.samples(len(dice))
+        if k >= len(groups):
+            for child in node.iter_children():
+                yield child, dice + (child.rolls[0],)
+            return
+
+        # Common random numbers: the draw depends on the position searched and
+        # the rolls so far, not on the decisions
+        rng = random.Random(f"{self.seed}:{self.root_key}:{dice}")
+        representative = {roll: action for action, (rolls, _, _) in groups.items() for roll in rolls}
+        counts = {}
+        for roll in rng.choices(_ROLLS, _WEIGHTS, k=k):
+            first, count = counts.get(representative[roll], (roll, 0))
+            counts[representative[roll]] = (first, count + 1)
+        self.draws[node] = k
+        for action, (first, count) in counts.items():
+            child = node.make_child(action)
+            # Eval averages by these weights: the share of draws for this outcome
+            child.probability = count / k
+            yield child, dice + (first,)
+
+    def variance(self, node):
+        """(variance of zero_value, variance of one_value) at a searched node"""
+        if not node.action:
+            return 0.0, 0.0
+        children = [child for _, child in node.action]
+        if node.node_type != "chance":
+            # The mover's choice, as Node.Eval made it
+            return self.variance(node.best_child())
+
+        total = sum(child.probability for child in children)
+        weights = [child.probability / total for child in children]
+        child_variances = [self.variance(child) for child in children]
+        result = []
+        for player, mean in enumerate((node.zero_value, node.one_value)):
+            # Noise of the children's own estimates, plus the spread of the draws here
+            value = sum(w * w * v[player] for w, v in zip(weights, child_variances))
+            k = self.draws.get(node)
+            if k is not None and k > 1:
+                values = [child.zero_value if player == 0 else child.one_value for child in children]
+                spread = sum(w * (v - mean) ** 2 for w, v in zip(weights, values)) * k / (k - 1)
+                value += spread / k
+            elif k == 1:
+                value += _roll_spread(node)[player]
+            result.append(value)
+        return tuple(result)
+
+    def variances(self, root):
+        """{action: (variance of zero_value, variance of one_value)} for the searched root"""
+        return {action: self.variance(child) for action, child in root.action}
+
+
+def _roll_spread(node):
+    """(variance of zero_value, of one_value) over the rolls at chance node
+    `node`, from the utilities right after each roll. Utility only depends on
+    balances and ownership, so each roll's balance changes are applied in
+    place and undone, as beam_search does; the node's searched values are
+    left alone."""
+    roller, other = node.current_player, node.second_player
+    zero, one = (roller, other) if roller.ID == 0 else (other, roller)
+    outcomes = []
+    for _, probability, outcome in node.roll_groups().values():
+        _, balance_change, opponent_change, _, _ = outcome
+        roller.balance += balance_change
+        other.balance += opponent_change
+        outcomes.append((probability, (player_utility(zero), player_utility(one))))
+        roller.balance -= balance_change
+        other.balance -= opponent_change
+    spread = []
+    for player in (0, 1):
+        mean = sum(probability * values[player] for probability, values in outcomes)
+        spread.append(sum(probability * (values[player] - mean) ** 2 for probability, values in outcomes))
+    return tuple(spread)
+
+
+def _search(node, depth, sampler=None):
+    start = time.perf_counter()
+    mono_tree = tree.MonopolyTree(node, sampler=sampler)
+    mono_tree.search(depth)
+    return time.perf_counter() - start, len(mono_tree.leafs)
+
+
+def benchmark(depths=(8, 10), schedule=DEFAULT_SCHEDULE, full_depth=5, positions=10, replicates=8):
+    from opening_book import opening_positions
+
+    # Early positions with a real choice to make
+    roots = [node for node in opening_positions(3) if len(list(node.legal_actions())) > 1][:positions]
+    seconds = leaves = 0
+    for root in roots:
+        elapsed, count = _search(root.detached(), full_depth)
+        seconds, leaves = seconds + elapsed, leaves + count
+    print(f"{len(roots)} positions, full search depth {full_depth}: {leaves} leaves {seconds:.2f}s")
+    for depth in depths:
+        seconds = leaves = 0
+        for root in roots:
+            elapsed, count = _search(root.detached(), depth, SparseSampler(schedule))
+            seconds, leaves = seconds + elapsed, leaves + count
+        print(f"sampled depth {depth}, schedule {schedule}: {leaves} leaves {seconds:.2f}s")
+
+    # Estimated standard errors against the spread over independent seeds
+    root = roots[0]
+    mover = root.current_player.ID
+    print(f"standard errors at depth {depths[0]}, first position, over {replicates} seeds:")
+    values, estimates = {}, {}
+    for seed in range(replicates):
+        node = root.detached()
+        sampler = SparseSampler(schedule, seed)
+        _search(node, depths[0], sampler)
+        variances = sampler.variances(node)
+        for action, child in node.action:
+            values.setdefault(action, []).append(child.zero_value if mover == 0 else child.one_value)
+            estimates.setdefault(action, []).append(variances[action][mover] ** 0.5)
+    for action in values:
+        print(f"    {action:20s} mean {statistics.mean(values[action]):8.1f}  estimated "
+              f"{statistics.mean(estimates[action]):6.1f}  observed {statistics.stdev(values[action]):6.1f}")
+    first, second = list(values)[:2]
+    differences = [a - b for a, b in zip(values[first], values[second])]
+    # Common random numbers: both actions see the same dice, so their difference is steadier
+    print(f"    {first} - {second}: observed {statistics.stdev(differences):.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sparse-sampled search against a full search")
+    parser.add_argument("--depths", type=int, nargs="+", default=[8, 10])
+    parser.add_argument("--schedule", type=int, nargs="+", default=list(DEFAULT_SCHEDULE),
+                        help="rolls drawn per chance level, shrinking with depth")
+    parser.add_argument("--full-depth", type=int, default=5)
+    parser.add_argument("--positions", type=int, default=10)
+    parser.add_argument("--replicates", type=int, default=8, help="seeds for the standard error check")
+    args = parser.parse_args()
+    benchmark(args.depths, tuple(args.schedule), args.full_depth, args.positions, args.replicates)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+import tree
+from quiescence import sample_positions
+
+
+class CancelAfter:
+    """Cancel token that fires after `checks` polls"""
+
+    def __init__(self, checks):
+        self.checks = checks
+
+    @property
+    def cancelled(self):
+        self.checks -= 1
+        return self.checks < 0
+
+
+def test_cancelled_search_keeps_partial_values():
+    root = sample_positions(1)[0]
+    assert len(list(root.legal_actions())) > 1
+    mono_tree = tree.MonopolyTree(root, cancel_token=CancelAfter(200))
+    assert mono_tree.search(6) is False
+    # The values backed up before the cancellation still choose a move
+    assert root.best_action is not None
+    assert mono_tree.result.best_action == root.best_action
+    best = root.best_child()
+    assert (root.zero_value, root.one_value) == (best.zero_value, best.one_value)
+
+
+def test_uncancelled_search_finishes():
+    root = sample_positions(1)[0]
+    mono_tree = tree.MonopolyTree(root, cancel_token=tree.CancellationToken())
+    assert mono_tree.search(3) is True
+    assert root.best_action is not None
@@ -0,0 +1,34 @@
+import maxn
+
+
+def lopsided_position():
+    """Player 0 to roll while player 2 holds most of the table's utility"""
+    root = maxn.MultiNode.start(3)
+    for player, balance in zip(root.players, (300, 300, 1900)):
+        player.balance = balance
+    root.node_type = "chance"
+    return root
+
+
+def search(mode, pruning, depth=4):
+    root = lopsided_position()
+    search = maxn.MaxnSearch(root, max_nodes=None, mode=mode, pruning=pruning)
+    search.search(depth)
+    return search.nodes, [(action, child.value) for action, child in root.action]
+
+
+def test_shallow_pruning_cuts_when_one_player_dominates():
+    full_nodes, full_values = search("maxn", False)
+    pruned_nodes, pruned_values = search("maxn", True)
+    assert pruned_nodes < full_nodes
+    assert [(action, round(value, 9)) for action, value in pruned_values] == \
+        [(action, round(value, 9)) for action, value in full_values]
+
+
+def test_paranoid_pruning_cuts():
+    full_nodes, full_values = search("paranoid", False)
+    pruned_nodes, pruned_values = search("paranoid", True)
+    assert pruned_nodes < full_nodes
+    # A chance root averages its children, so their values stay exact
+    assert [(action, round(value, 9)) for action, value in pruned_values] == \
+        [(action, round(value, 9)) for action, value in full_values]
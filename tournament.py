@@ -0,0 +1,207 @@
+"""
+Round-robin tournament between engine configurations.
+
+Each configuration is an engine type, a search depth (the game's
+intelligence_level) and an evaluator, written as ENGINE:DEPTH[:EVALUATOR]:
+
+    expectimax:5              MonopolyTree with Node.utility (what the game uses)
+    alphabeta:5               zero-sum AlphaBetaSearch
+    expectimax:3:model        MonopolyTree with the learned value_model evaluator
+    expectimax:3:rent_flow=10 Node.utility plus 10 turns of expected rent (landing.py)
+
+Every pair plays the same dice seeds twice, once from each seat, so luck
+cancels out as far as possible. Games run in parallel worker processes.
+The report gives Elo ratings (Bradley-Terry maximum likelihood, mean 0)
+with bootstrap confidence intervals, and each configuration's mean time
+per decision:
+
+    python tournament.py expectimax:2 expectimax:3 expectimax:4 alphabeta:4 --games 20
+"""
+
+import argparse
+import itertools
+import math
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import alphabeta
+import tree
+from node import Node, UTILITY_WEIGHTS, roll_dice, set_utility_weights, winner
+
+ENGINES = ("expectimax", "alphabeta")
+# Games still running after this many plies are scored as draws
+MAX_PLIES = 1000
+
+
+class EngineConfig:
+    def __init__(self, spec, weights=None):
+        self.spec = spec
+        # Node.utility weights for this engine's searches (None: the loaded ones)
+        self.weights = weights
+        parts = spec.split(":")
+        if len(parts) not in (2, 3) or parts[0] not in ENGINES or not parts[1].isdigit():
+            raise ValueError(f"bad engine spec {spec!r}, expected ENGINE:DEPTH[:EVALUATOR]")
+        self.engine = parts[0]
+        self.depth = int(parts[1])
+        self.evaluator = parts[2] if len(parts) == 3 else "utility"
+        self.rent_flow_turns = 0
+        if self.evaluator.startswith("rent_flow="):
+            self.rent_flow_turns = int(self.evaluator.split("=", 1)[1])
+        elif self.evaluator not in ("utility", "model"):
+            raise ValueError(f"unknown evaluator {self.evaluator!r} in {spec!r}")
+        if self.engine == "alphabeta" and self.evaluator == "model":
+            # The model scores win probabilities, not zero-sum utility differences
+            raise ValueError("the learned evaluator only works with the expectimax engine")
+        self._leaf_evaluator = None
+
+    def leaf_evaluator(self):
+        if self.evaluator == "model" and self._leaf_evaluator is None:
+            import value_model
+            model = value_model.ValueModel.load()
+            if model is None:
+                raise SystemExit("No value model; run 'python value_model.py train' first")
+            self._leaf_evaluator = value_model.LeafEvaluator(model)
+        return self._leaf_evaluator
+
+    def choose(self, node):
+        """Search decision node `node` and return the child this engine picks"""
+        loaded_weights = dict(UTILITY_WEIGHTS)
+        loaded_rent_flow = Node.rent_flow_turns
+        Node.rent_flow_turns = self.rent_flow_turns
+        if self.weights is not None:
+            set_utility_weights(self.weights)
+        try:
+            if self.engine == "alphabeta":
+                alphabeta.AlphaBetaSearch(node).search(self.depth)
+            else:
+                tree.MonopolyTree(node, evaluator=self.leaf_evaluator()).search(self.depth)
+        finally:
+            Node.rent_flow_turns = loaded_rent_flow
+            set_utility_weights(loaded_weights)
+        return node.best_child()
+
+
+def play_game(configs, seed):
+    """Play configs[0] (player 0) against configs[1] with the dice of `seed`.
+
+    Returns (score of player 0: 1, 0 or 0.5, [(seconds, decisions)] per player).
+    """
+    from opening_book import start_node
+
+    rng = random.Random(seed)
+    node = start_node()
+    thinking = [[0.0, 0], [0.0, 0]]
+    for _ in range(MAX_PLIES):
+        won = winner(node)
+        if won is not None:
+            return (1.0 if won == 0 else 0.0), thinking
+        if node.node_type == "chance":
+            node.get_children()
+            node = node.child_for_roll(roll_dice(rng)).detached()
+            continue
+        mover = node.current_player.ID
+        start = time.perf_counter()
+        child = configs[mover].choose(node)
+        thinking[mover][0] += time.perf_counter() - start
+        thinking[mover][1] += 1
+        node = child.detached()
+    return 0.5, thinking
+
+
+_configs = {}
+
+
+def _play(specs, seed):
+    # Worker processes keep their configs (and any loaded model) between games
+    configs = [_configs.setdefault(spec, EngineConfig(spec)) for spec in specs]
+    return play_game(configs, seed)
+
+
+def elo_ratings(results, players, iterations=200):
+    """Bradley-Terry ratings on the Elo scale, mean 0, from
+    [(player a, player b, score of a)] with draws scored 0.5"""
+    wins = [0.0] * players
+    games = [[0] * players for _ in range(players)]
+    for a, b, score in results:
+        wins[a] += score
+        wins[b] += 1 - score
+        games[a][b] += 1
+        games[b][a] += 1
+    # Half a win and half a loss against a virtual opponent of strength 1
+    # keeps ratings finite for players that won or lost everything
+    strength = [1.0] * players
+    for _ in range(iterations):
+        updated = []
+        for i in range(players):
+            denominator = sum(games[i][j] / (strength[i] + strength[j]) for j in range(players) if games[i][j])
+            denominator += 1 / (strength[i] + 1)
+            updated.append((wins[i] + 0.5) / denominator)
+        log_mean = sum(math.log(s) for s in updated) / players
+        strength = [s / math.exp(log_mean) for s in updated]
+    return [400 * math.log10(s) for s in strength]
+
+
+def run_tournament(specs, games=20, workers=None, seed=0, bootstrap=200):
+    configs = [EngineConfig(spec) for spec in specs]
+    jobs = []
+    for a, b in itertools.combinations(range(len(configs)), 2):
+        # Each dice seed twice, with the seats swapped
+        for game in range(games):
+            first, second = (a, b) if game % 2 == 0 else (b, a)
+            jobs.append((first, second, seed + game // 2))
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        outcomes = list(pool.map(_play, [(specs[first], specs[second]) for first, second, _ in jobs],
+                                 [game_seed for _, _, game_seed in jobs]))
+    elapsed = time.perf_counter() - start
+
+    results = []
+    thinking = [[0.0, 0] for _ in configs]
+    for (first, second, _), (score, seconds) in zip(jobs, outcomes):
+        results.append((first, second, score))
+        for player, index in ((0, first), (1, second)):
+            thinking[index][0] += seconds[player][0]
+            thinking[index][1] += seconds[player][1]
+
+    ratings = elo_ratings(results, len(configs))
+    rng = random.Random(seed)
+    samples = [elo_ratings([rng.choice(results) for _ in results], len(configs)) for _ in range(bootstrap)]
+
+    print(f"{len(results)} games in {elapsed:.1f}s")
+    print(f"{'configuration':28s} {'Elo':>6s} {'95% CI':>15s} {'score':>9s} {'ms/decision':>12s}")
+    order = sorted(range(len(configs)), key=lambda index: -ratings[index])
+    for index in order:
+        low, high = _percentiles([sample[index] for sample in samples], (2.5, 97.5))
+        score = sum(s if a == index else 1 - s for a, b, s in results if index in (a, b))
+        played = sum(1 for a, b, _ in results if index in (a, b))
+        seconds, decisions = thinking[index]
+        print(f"{specs[index]:28s} {ratings[index]:6.0f} [{low:6.0f}, {high:6.0f}] "
+              f"{score:4.1f}/{played:<4d} {1000 * seconds / max(decisions, 1):12.1f}")
+    return ratings
+
+
+def _percentiles(values, percents):
+    values = sorted(values)
+    return [values[min(len(values) - 1, int(p / 100 * len(values)))] for p in percents]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Round-robin Elo tournament between engine configurations")
+    parser.add_argument("configs", nargs="+", help="ENGINE:DEPTH[:EVALUATOR], e.g. expectimax:5 alphabeta:4")
+    parser.add_argument("--games", type=int, default=20, help="games per pair (even: both seats per seed)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    try:
+        configs = [EngineConfig(spec) for spec in args.configs]
+    except ValueError as e:
+        parser.error(str(e))
+    if len(configs) < 2:
+        parser.error("need at least two configurations")
+    run_tournament(args.configs, args.games, args.workers, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,45 +1,210 @@
+import threading
 from typing import List, Dict
-from node import Node
+from node import Node, search_terminal
+from quiescence import volatile
+
+
+class CancellationToken:
+    """Stop flag shared between a running search and the thread that owns it.
+
+    A token created with a parent is also cancelled when its parent is, so a
+    game-wide token can stop every search while a per-search token can be
+    cancelled on its own (e.g. when the game is paused).
+    """
+
+    def __init__(self, parent=None, event=None):
+        # A multiprocessing.Event lets the token stop searches in other processes
+        self._event = threading.Event() if event is None else event
+        self.parent = parent
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self):
+        if self._event.is_set():
+            return True
+        return self.parent is not None and self.parent.cancelled
+
+
+class SearchResult:
+    """What a search found at its root.
+
+    `action_values` lists (action, zero_value, one_value) for every root
+    action, best first for the player to move (first found among equals, as
+    the search picks). `principal_variation` is the expected line: the
+    mover's best action at each decision node and the likeliest roll at each
+    chance node, as far as the search went; `pv_moves` maps the state key of
+    each decision node on it to its best action, for ordering the next
+    search's moves (MonopolyTree and AlphaBetaSearch take it as `pv`).
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.mover = root.current_player.ID
+        if root.node_type == "chance":
+            ranked = sorted(root.action, key=lambda item: -item[1].probability)
+        else:
+            # The search's pick first: alpha-beta's other values are bounds
+            # that may tie with it
+            ranked = sorted(root.action, key=lambda item: (item[0] != root.best_action, -self.value(item[1])))
+        self.action_values = [(action, child.zero_value, child.one_value) for action, child in ranked]
+        self.best_action = ranked[0][0] if ranked else None
+        self.principal_variation = []
+        self.pv_moves = {}
+        # Each node on the line already knows its best step (Node.Eval)
+        node = root
+        while node.best_action is not None and node.action:
+            if node.node_type != "chance":
+                self.pv_moves[node.state_key()] = node.best_action
+            self.principal_variation.append(node.best_action)
+            node = next(child for action, child in node.action if action == node.best_action)
+
+    def value(self, node):
+        """`node`'s value to the player to move at the root"""
+        return node.zero_value if self.mover == 0 else node.one_value
+
+    def mover_values(self):
+        """{action: value to the player to move at the root}"""
+        index = 1 if self.mover == 0 else 2
+        return {entry[0]: entry[index] for entry in self.action_values}
+
+    def margins(self):
+        """[(action, value to the mover minus the best action's)], best first"""
+        if not self.action_values:
+            return []
+        index = 1 if self.mover == 0 else 2
+        best = self.action_values[0][index]
+        return [(entry[0], entry[index] - best) for entry in self.action_values]
+
+    def line_text(self, plies=6):
+        """The first `plies` steps of the principal variation, e.g. 'buy, rolls 7, pay rent'"""
+        steps = []
+        for action in self.principal_variation[:plies]:
+            if isinstance(action, tuple):
+                total, doubles = action
+                steps.append(f"rolls {total}{' (doubles)' if doubles else ''}")
+            else:
+                steps.append(action.replace('_', ' '))
+        return ", ".join(steps)
 
 
 class MonopolyTree:
-    def __init__(self, root_node):
+    def __init__(self, root_node, cancel_token=None, book=None, cache=None, evaluator=None, sampler=None,
+                 quiescence=0, beam=None, pv=None):
         self.rootNode = root_node
         self.leafs: List[Node] = []
+        self.cancel_token = cancel_token
+        # Optional opening_book.OpeningBook; positions it covers are not searched
+        self.book = book
+        # Optional eval_cache.EvalCache shared across games and runs
+        self.cache = cache
+        # Optional batch leaf evaluator (e.g. value_model.LeafEvaluator): scores
+        # all leaves in one call instead of Node.utility
+        self.evaluator = evaluator
+        # Optional sparse_sampling.SparseSampler: chance nodes expand only
+        # sampled dice rolls, so values are estimates
+        self.sampler = sampler
+        # Plies past the nominal depth that volatile leaves (unpaid rent,
+        # income tax, a balance near the low-balance penalty) may be extended
+        self.quiescence = quiescence
+        # Optional beam_search.Beam: decision nodes keep only their best-scoring children
+        self.beam = beam
+        # Optional SearchResult.pv_moves of an earlier search: decision nodes
+        # on that line expand their expected best action first
+        self.pv = pv
+        # SearchResult of the last search
+        self.result = None
+        # (node, remaining depth) of expanded nodes whose values are worth caching
+        self.cacheable: List[tuple] = []
+        # False once the search has been cut short by the cancel token
+        self.completed = True
+    
+    def is_cancelled(self):
+        return self.cancel_token is not None and self.cancel_token.cancelled
     
     def generate_tree(self, depth: int):
         self.generate_subtree(self.rootNode, depth, 0)
         return self.rootNode
     
-    def generate_subtree(self, node: Node, depth: int, current_depth: int) -> None:
-        # Terminal condition: reached maximum depth
-        if current_depth >= depth:
+    def search(self, depth: int) -> bool:
+        """Generate and evaluate the tree; returns False if it was cancelled.
+        
+        Values of fully searched subtrees are written to the cache, if any,
+        and the root's action values and principal variation to self.result.
+        A cancelled search still backs up what it expanded, so its root
+        values and result are the best found before the cancellation.
+        """
+        if self.sampler is not None:
+            self.sampler.start(self.rootNode)
+        self.generate_tree(depth)
+        if self.evaluator is not None:
+            # Also after a cancellation: leaves scored by utility() instead
+            # would not be comparable with the evaluator's values
+            self.evaluator.evaluate(self.leafs)
+        Node.Eval(self)
+        finished = self.completed
+        self.result = SearchResult(self.rootNode)
+        if finished and self.cache is not None:
+            for node, remaining in self.cacheable:
+                self.cache.put(node.state_key(), remaining, node.zero_value, node.one_value)
+            self.cache.flush()
+        return finished
+    
+    def generate_subtree(self, node: Node, depth: int, current_depth: int, dice: tuple = (),
+                         decisions: int = 0) -> None:
+        # Cancelled: stop expanding, the node is scored as a leaf so the
+        # partial tree still yields the best values found so far
+        if self.is_cancelled():
+            self.completed = False
             self.leafs.append(node)
             return
         
-        # Terminal condition: bankruptcy (game over)
-        # Check both players for bankruptcy
-        if node.current_player.balance < 0 or node.second_player.balance < 0:
+        # Terminal condition: reached maximum depth, unless the leaf is
+        # volatile and the extension cap has not been reached
+        if current_depth >= depth and not (current_depth < depth + self.quiescence and volatile(node)):
             self.leafs.append(node)
             return
         
-        # Terminal condition: someone won (balance > 2000)
-        if node.current_player.balance > 2000 or node.second_player.balance > 2000:
-            self.leafs.append(node)
+        # Opening book hit: use the stored deep-search values instead of searching
+        if self.book is not None and self._apply_book(node, current_depth):
             return
         
-        # Generate all possible next states (children)
-        next_states: List[Node] = node.get_children()
+        # Cache hit: this state was already searched at least this deep.
+        # Not at the root, whose per-action values the caller needs.
+        remaining = depth - current_depth
+        if self.cache is not None and current_depth > 0 and remaining >= self.cache.min_depth:
+            cached = self.cache.get(node.state_key(), remaining)
+            if cached is not None:
+                node.zero_value, node.one_value = cached
+                node.known_value = True
+                self.leafs.append(node)
+                return
         
-        # If no valid moves possible, treat as leaf
-        if len(next_states) == 0:
+        # Terminal condition: bankruptcy (game over) or someone won (balance
+        # over the win threshold). The root is always expanded: a tuned
+        # threshold below $2000 must not leave the mover without a move.
+        if current_depth > 0 and search_terminal(node):
             self.leafs.append(node)
             return
         
-        # Recursively generate subtrees for all children
-        # Important: For chance nodes, this generates ALL 6 dice outcomes
-        # For decision nodes, this generates all possible actions
-        for child_node in next_states:
+        # Recursively generate subtrees, building each child only when we
+        # descend into it
+        # Important: For chance nodes, this generates one child per group of
+        # 2d6 rolls with identical outcomes (or only the sampled rolls, with a
+        # sampler; `dice` are the rolls sampled on the way here)
+        # For decision nodes, this generates all possible actions (or the
+        # beam's best, by the number of `decisions` above the node)
+        if self.sampler is not None and node.node_type == "chance":
+            children = self.sampler.children(node, dice)
+        elif self.beam is not None and node.node_type != "chance":
+            children = ((child_node, dice) for child_node in self.beam.children(node, decisions))
+        else:
+            first = None
+            if self.pv and node.node_type != "chance":
+                first = self.pv.get(node.state_key())
+            children = ((child_node, dice) for child_node in node.iter_children(first))
+        for child_node, child_dice in children:
             # Set parent reference for bottom-up evaluation
             child_node.parent = node
             
@@ -47,4 +212,52 @@ class MonopolyTree:
             child_node.round = node.round + 1
             
             # Recursively expand this child
-            self.generate_subtree(child_node, depth, current_depth + 1)
\ No newline at end of file
+            self.generate_subtree(child_node, depth, current_depth + 1, child_dice,
+                                  decisions + (node.node_type != "chance"))
+            
+            # Cancelled: the children not reached yet are never built
+            if self.is_cancelled():
+                self.completed = False
+                break
+        
+        # If no valid moves possible, treat as leaf
+        if len(node.action) == 0:
+            self.leafs.append(node)
+            return
+        
+        # Sampled, beam-narrowed or quiescence-extended values are not the
+        # fixed-depth search's the cache is keyed by
+        if (self.cache is not None and self.sampler is None and self.beam is None and
+                not self.quiescence and remaining >= self.cache.min_depth):
+            self.cacheable.append((node, remaining))
+
+    def _apply_book(self, node: Node, current_depth: int) -> bool:
+        entry = self.book.lookup(node)
+        if entry is None:
+            return False
+        
+        if current_depth > 0:
+            # Inner node: its value is the book value of the mover's best action
+            if node.current_player.ID == 0:
+                node.zero_value, node.one_value = max(entry.values(), key=lambda v: v[0])
+            else:
+                node.zero_value, node.one_value = max(entry.values(), key=lambda v: v[1])
+            node.known_value = True
+            self.leafs.append(node)
+            return True
+        
+        # Root: the caller needs per-action values, so expand one ply and
+        # give each child its book value
+        node.get_children()
+        if any(action not in entry for action, _ in node.action):
+            # Book built from different rules - fall back to searching
+            node.action = []
+            node.children = []
+            return False
+        for action, child_node in node.action:
+            child_node.parent = node
+            child_node.round = node.round + 1
+            child_node.zero_value, child_node.one_value = entry[action]
+            child_node.known_value = True
+            self.leafs.append(child_node)
+        return True
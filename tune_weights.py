@@ -0,0 +1,178 @@
+"""
+Self-play tuning of the Node.utility weights.
+
+Candidate weight sets (rent multiplier, low-balance threshold and penalty
+factor, monopoly bonus, and the search's win threshold) are generated by a grid, random
+sampling or a CMA-style evolution strategy, in a unit cube mapped onto
+PARAMETERS. Each candidate plays games against the default weights in
+parallel worker processes, every dice seed from both seats. Games are played
+in batches and a candidate is dropped as soon as its score is clearly below
+50%. The best weights are written to node.UTILITY_WEIGHTS_PATH; Node.utility
+uses them when the MONOPOLY_UTILITY_WEIGHTS environment variable names that
+file:
+
+    python tune_weights.py --strategy es --candidates 24 --games 40 --depth 2
+    MONOPOLY_UTILITY_WEIGHTS=utility_weights.json python ai_monopoly_pygame.py
+"""
+
+import argparse
+import itertools
+import json
+import math
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from node import DEFAULT_UTILITY_WEIGHTS, UTILITY_WEIGHTS_ENV, UTILITY_WEIGHTS_PATH
+from tournament import EngineConfig, play_game
+
+# name: (lowest, highest, searched on a log scale)
+PARAMETERS = {
+    "rent_multiplier": (0, 30, False),
+    "low_balance": (0, 500, False),
+    "low_balance_factor": (1, 100000, True),
+    "win_threshold": (1500, 2500, False),
+    "monopoly_bonus": (0, 500, False),
+}
+
+
+def decode(point):
+    """Weights for a point of the unit cube"""
+    weights = {}
+    for (name, (low, high, log_scale)), x in zip(PARAMETERS.items(), point):
+        x = min(max(x, 0.0), 1.0)
+        if log_scale:
+            value = math.exp(math.log(low) + x * (math.log(high) - math.log(low)))
+        else:
+            value = low + x * (high - low)
+        weights[name] = round(value)
+    return weights
+
+
+def encode(weights):
+    """Point of the unit cube for `weights`"""
+    point = []
+    for name, (low, high, log_scale) in PARAMETERS.items():
+        if log_scale:
+            point.append((math.log(weights[name]) - math.log(low)) / (math.log(high) - math.log(low)))
+        else:
+            point.append((weights[name] - low) / (high - low))
+    return point
+
+
+def grid_points(count):
+    """About `count` points on an even grid (the same number of levels per parameter)"""
+    levels = max(2, round(count ** (1 / len(PARAMETERS))))
+    axis = [i / (levels - 1) for i in range(levels)]
+    return [list(point) for point in itertools.product(axis, repeat=len(PARAMETERS))]
+
+
+class EvolutionStrategy:
+    """Diagonal CMA-style strategy: sample around a mean, move the mean to the
+    best half of each generation and adapt the per-parameter step sizes"""
+
+    def __init__(self, mean, sigma=0.2, population=8, seed=0):
+        self.mean = list(mean)
+        self.sigma = [sigma] * len(mean)
+        self.population = population
+        self.rng = random.Random(seed)
+
+    def ask(self):
+        return [[min(max(m + s * self.rng.gauss(0, 1), 0.0), 1.0) for m, s in zip(self.mean, self.sigma)]
+                for _ in range(self.population)]
+
+    def tell(self, points, scores):
+        ranked = [point for _, point in sorted(zip(scores, points), key=lambda item: -item[0])]
+        elite = ranked[:max(2, len(ranked) // 2)]
+        # Rank weights: the best of the elite counts most
+        weights = [math.log(len(elite) + 0.5) - math.log(rank + 1) for rank in range(len(elite))]
+        total = sum(weights)
+        old_mean = self.mean
+        self.mean = [sum(w * point[i] for w, point in zip(weights, elite)) / total for i in range(len(old_mean))]
+        self.sigma = [
+            max(0.02, math.sqrt(sum(w * (point[i] - old_mean[i]) ** 2 for w, point in zip(weights, elite)) / total))
+            for i in range(len(old_mean))
+        ]
+
+
+def _play_candidate(weights, seed, candidate_seat, depth):
+    candidate = EngineConfig(f"expectimax:{depth}", weights)
+    baseline = EngineConfig(f"expectimax:{depth}", DEFAULT_UTILITY_WEIGHTS)
+    configs = [candidate, baseline] if candidate_seat == 0 else [baseline, candidate]
+    score, _ = play_game(configs, seed)
+    return score if candidate_seat == 0 else 1 - score
+
+
+def evaluate(pool, weights, games=40, depth=2, batch=8, seed=0):
+    """(score against the defaults, games played); stops early once the score
+    is more than two standard errors below 50%"""
+    scores = []
+    for start in range(0, games, batch):
+        # Each dice seed from both seats
+        jobs = [(seed + game // 2, game % 2) for game in range(start, min(start + batch, games))]
+        scores += pool.map(_play_candidate, [weights] * len(jobs), [s for s, _ in jobs],
+                           [seat for _, seat in jobs], [depth] * len(jobs))
+        mean = sum(scores) / len(scores)
+        variance = sum((s - mean) ** 2 for s in scores) / max(len(scores) - 1, 1)
+        if len(scores) < games and mean + 2 * math.sqrt(variance / len(scores)) < 0.5:
+            break
+    return sum(scores) / len(scores), len(scores)
+
+
+def tune(strategy="es", candidates=24, games=40, depth=2, workers=None, seed=0, output=UTILITY_WEIGHTS_PATH):
+    rng = random.Random(seed)
+    best_weights, best_score = dict(DEFAULT_UTILITY_WEIGHTS), 0.5
+    start = time.perf_counter()
+    total_games = 0
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        def run(point):
+            nonlocal best_weights, best_score, total_games
+            weights = decode(point)
+            score, played = evaluate(pool, weights, games, depth, seed=seed)
+            total_games += played
+            complete = played == games
+            print(f"{json.dumps(weights)} score={score:.3f} games={played}{'' if complete else ' (stopped early)'}")
+            # Only candidates that played the full schedule can become the best
+            if complete and score > best_score:
+                best_weights, best_score = weights, score
+            return score
+
+        if strategy == "grid":
+            for point in grid_points(candidates):
+                run(point)
+        elif strategy == "random":
+            for _ in range(candidates):
+                run([rng.random() for _ in PARAMETERS])
+        else:
+            es = EvolutionStrategy(encode(DEFAULT_UTILITY_WEIGHTS), seed=seed)
+            for _ in range(max(1, candidates // es.population)):
+                points = es.ask()
+                es.tell(points, [run(point) for point in points])
+
+    print(f"{total_games} games in {time.perf_counter() - start:.1f}s")
+    if best_weights == DEFAULT_UTILITY_WEIGHTS:
+        print("No candidate beat the default weights")
+    else:
+        print(f"Best: {json.dumps(best_weights)} scoring {best_score:.3f} against the defaults")
+    with open(output, "w") as f:
+        json.dump(best_weights, f, indent=2)
+    print(f"Wrote {output}; set {UTILITY_WEIGHTS_ENV}={output} to play with it")
+    return best_weights
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tune the Node.utility weights by self-play")
+    parser.add_argument("--strategy", choices=["grid", "random", "es"], default="es")
+    parser.add_argument("--candidates", type=int, default=24)
+    parser.add_argument("--games", type=int, default=40, help="games per candidate (even: both seats per seed)")
+    parser.add_argument("--depth", type=int, default=2, help="search depth of both sides")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=UTILITY_WEIGHTS_PATH)
+    args = parser.parse_args()
+    tune(args.strategy, args.candidates, args.games, args.depth, args.workers, args.seed, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,281 @@
+"""
+Learned value function for use as a cheap leaf evaluator.
+
+Node.utility is a hand-written score, so its mistakes have to be made up
+for with search depth. This module plays self-play games, labels every
+position with the final outcome of its game, and fits a compact NumPy model
+- logistic regression or a small MLP - from ownership, monopolies and
+buildings, positions, jail state and balances to player 0's probability of
+winning. A model saved under other game rules (node.RULES_VERSION) is not
+loaded.
+
+LeafEvaluator plugs the model into MonopolyTree, which then scores all of
+its leaves in one batch; finished games score exactly 1 or 0. Values in
+such a tree are win probabilities (zero_value = P(player 0 wins),
+one_value = 1 - zero_value), so they are not comparable with utility()
+scores, the opening book or the evaluation cache:
+
+    tree.MonopolyTree(root, evaluator=LeafEvaluator(ValueModel.load()))
+
+Train, then play the model against plain search, with:
+    python value_model.py train --games 300
+    python value_model.py match --depth 3 --reference-depth 5
+"""
+
+import argparse
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import tree
+from node import RULES_VERSION, roll_dice, winner
+from property import COLOR_GROUPS, GROUP_MASKS, HOTEL, PROPERTY_DEFINITIONS, assign_random_taxes
+
+DEFAULT_MODEL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "value_model.npz")
+
+_PROPERTY_INDEX = {position: index for index, (position, _, _) in enumerate(PROPERTY_DEFINITIONS)}
+_GROUP_INDEX = {group: index for index, group in enumerate(COLOR_GROUPS)}
+# Per player: owned properties, board position, balance terms, jail state,
+# then per color group a monopoly flag and how far it is built up
+_PLAYER_FEATURES = len(PROPERTY_DEFINITIONS) + 40 + 3 + 2 + 2 * len(COLOR_GROUPS)
+FEATURES = 2 * _PLAYER_FEATURES + 2
+
+# Self-play games still running after this many plies count as draws
+MAX_PLIES = 1000
+
+
+def features(nodes):
+    """Feature matrix (len(nodes) x FEATURES), player 0's block first"""
+    X = np.zeros((len(nodes), FEATURES))
+    for row, node in enumerate(nodes):
+        for player in (node.current_player, node.second_player):
+            offset = player.ID * _PLAYER_FEATURES
+            for prop in player.properties:
+                X[row, offset + _PROPERTY_INDEX[prop.position]] = 1.0
+            offset += len(PROPERTY_DEFINITIONS)
+            X[row, offset + player.position] = 1.0
+            offset += 40
+            X[row, offset] = player.balance / 1000
+            # Distance to the two game-ending thresholds
+            X[row, offset + 1] = min(player.balance, 200) / 200
+            X[row, offset + 2] = max(player.balance - 1500, 0) / 500
+            X[row, offset + 3] = float(player.in_jail)
+            X[row, offset + 4] = player.jail_turns / 3
+            offset += 5
+            for group, mask in GROUP_MASKS.items():
+                if player.monopoly_mask & mask:
+                    X[row, offset + 2 * _GROUP_INDEX[group]] = 1.0
+            for prop in player.properties:
+                if prop.houses:
+                    # Fraction of the group's hotels
+                    streets = len(COLOR_GROUPS[prop.group][1])
+                    X[row, offset + 2 * _GROUP_INDEX[prop.group] + 1] += prop.houses / (HOTEL * streets)
+        X[row, -2] = float(node.current_player.ID)
+        X[row, -1] = float(node.node_type == "chance")
+    return X
+
+
+def _sigmoid(z):
+    return 1 / (1 + np.exp(-np.clip(z, -30, 30)))
+
+
+class ValueModel:
+    """P(player 0 wins) from state features: logistic regression or a
+    one-hidden-layer MLP, on standardised features"""
+
+    def __init__(self, kind="linear", hidden=32):
+        self.kind = kind
+        self.hidden = hidden
+        self.params = {}
+
+    def _standardise(self, X, fit=False):
+        if fit:
+            self.params['x_mean'], self.params['x_std'] = X.mean(0), X.std(0) + 1e-8
+        return (X - self.params['x_mean']) / self.params['x_std']
+
+    def fit(self, X, y, l2=1e-3, epochs=500, learning_rate=1e-2, seed=0):
+        """Full-batch Adam on the cross-entropy of outcomes `y` (1, 0 or 0.5 for a draw)"""
+        Z = self._standardise(X, fit=True)
+        rng = np.random.default_rng(seed)
+        if self.kind == "linear":
+            weights = {'w': np.zeros(Z.shape[1]), 'b': np.zeros(1)}
+        else:
+            weights = {
+                'W1': rng.normal(0, 1 / np.sqrt(Z.shape[1]), (Z.shape[1], self.hidden)),
+                'b1': np.zeros(self.hidden),
+                'w': rng.normal(0, 1 / np.sqrt(self.hidden), self.hidden),
+                'b': np.zeros(1),
+            }
+        moments = {name: (np.zeros_like(w), np.zeros_like(w)) for name, w in weights.items()}
+        for step in range(1, epochs + 1):
+            H = Z if self.kind == "linear" else np.tanh(Z @ weights['W1'] + weights['b1'])
+            # Gradient of the mean cross-entropy with respect to the logit
+            error = (_sigmoid(H @ weights['w'] + weights['b']) - y) / len(Z)
+            grads = {'w': H.T @ error + l2 * weights['w'], 'b': error.sum(keepdims=True)}
+            if self.kind != "linear":
+                dH = np.outer(error, weights['w']) * (1 - H ** 2)
+                grads['W1'] = Z.T @ dH + l2 * weights['W1']
+                grads['b1'] = dH.sum(0)
+            for name, grad in grads.items():
+                m, v = moments[name]
+                m[:] = 0.9 * m + 0.1 * grad
+                v[:] = 0.999 * v + 0.001 * grad ** 2
+                m_hat, v_hat = m / (1 - 0.9 ** step), v / (1 - 0.999 ** step)
+                weights[name] -= learning_rate * m_hat / (np.sqrt(v_hat) + 1e-8)
+        self.params.update(weights)
+        return self
+
+    def predict(self, X):
+        Z = self._standardise(X)
+        H = Z if self.kind == "linear" else np.tanh(Z @ self.params['W1'] + self.params['b1'])
+        return _sigmoid(H @ self.params['w'] + self.params['b'])
+
+    def save(self, path=DEFAULT_MODEL_PATH):
+        np.savez(path, kind=self.kind, hidden=self.hidden, rules_version=RULES_VERSION, **self.params)
+
+    @classmethod
+    def load(cls, path=DEFAULT_MODEL_PATH):
+        """Load a trained model, or return None if there is none at `path`
+        or it was trained under other game rules"""
+        if not os.path.exists(path):
+            return None
+        with np.load(path) as data:
+            # Features and outcomes differ under other rules
+            version = int(data['rules_version']) if 'rules_version' in data.files else None
+            if version != RULES_VERSION:
+                print(f"Value model disabled: trained under rules version {version}, "
+                      f"not {RULES_VERSION}; retrain it")
+                return None
+            model = cls(str(data['kind']), int(data['hidden']))
+            model.params = {name: data[name] for name in data.files
+                            if name not in ('kind', 'hidden', 'rules_version')}
+        return model
+
+
+class LeafEvaluator:
+    """Batch leaf evaluator for MonopolyTree(evaluator=...)"""
+
+    def __init__(self, model):
+        self.model = model
+
+    def evaluate(self, nodes):
+        open_nodes = []
+        for node in nodes:
+            if node.known_value:
+                continue
+            won = winner(node)
+            if won is None:
+                open_nodes.append(node)
+            else:
+                node.zero_value = 1.0 if won == 0 else 0.0
+                node.one_value = 1.0 - node.zero_value
+                node.known_value = True
+        if not open_nodes:
+            return
+        for node, probability in zip(open_nodes, self.model.predict(features(open_nodes))):
+            node.zero_value, node.one_value = float(probability), 1.0 - float(probability)
+            node.known_value = True
+
+
+def play_game(engines, seed, epsilon=0.0, record=False):
+    """Play one game; engines[i] = (depth, evaluator or None) for player i.
+
+    Returns (outcome for player 0: 1, 0 or 0.5, the positions seen if
+    `record`, [seconds spent deciding per player]).
+    """
+    from opening_book import start_node
+
+    rng = random.Random(seed)
+    node = start_node()
+    assign_random_taxes(node.properties)
+    positions = []
+    thinking = [0.0, 0.0]
+    for _ in range(MAX_PLIES):
+        won = winner(node)
+        if won is not None:
+            return (1.0 if won == 0 else 0.0), positions, thinking
+        if record:
+            positions.append(node.detached())
+        if node.node_type == "chance":
+            node.get_children()
+            node = node.child_for_roll(roll_dice(rng)).detached()
+            continue
+        depth, evaluator = engines[node.current_player.ID]
+        start = time.perf_counter()
+        tree.MonopolyTree(node, evaluator=evaluator).search(depth)
+        thinking[node.current_player.ID] += time.perf_counter() - start
+        if rng.random() < epsilon:
+            node = rng.choice(node.action)[1].detached()
+        else:
+            node = node.best_child().detached()
+    return 0.5, positions, thinking
+
+
+def _self_play(seed, depth, epsilon):
+    outcome, positions, _ = play_game([(depth, None), (depth, None)], seed, epsilon, record=True)
+    return features(positions), np.full(len(positions), outcome)
+
+
+def train(path=DEFAULT_MODEL_PATH, games=300, depth=2, epsilon=0.1, kind="linear", workers=None, seed=0):
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(_self_play, range(seed, seed + games), [depth] * games, [epsilon] * games))
+    print(f"Played {games} self-play games at depth {depth} in {time.perf_counter() - start:.1f}s")
+
+    # Hold out whole games, as positions of one game are strongly correlated
+    split = max(1, int(0.9 * games))
+    X = np.vstack([X for X, _ in results[:split]])
+    y = np.concatenate([y for _, y in results[:split]])
+    model = ValueModel(kind).fit(X, y)
+    if split < games:
+        X_test = np.vstack([X for X, _ in results[split:]])
+        y_test = np.concatenate([y for _, y in results[split:]])
+        p = np.clip(model.predict(X_test), 1e-6, 1 - 1e-6)
+        log_loss = -np.mean(y_test * np.log(p) + (1 - y_test) * np.log(1 - p))
+        print(f"{kind} model on {len(X)} positions: held-out log loss {log_loss:.3f} (0.693 = coin flip)")
+    model.save(path)
+    print(f"Saved {path}")
+
+
+def match(path=DEFAULT_MODEL_PATH, depth=3, reference_depth=5, games=20, seed=1000):
+    """Model at `depth` against plain search at `reference_depth`, same dice, both seats"""
+    model = ValueModel.load(path)
+    if model is None:
+        raise SystemExit(f"No model at {path}; run 'python value_model.py train' first")
+    learned = (depth, LeafEvaluator(model))
+    reference = (reference_depth, None)
+    score = 0.0
+    thinking = {'model': 0.0, 'reference': 0.0}
+    for game in range(games):
+        # Each dice seed is played twice, with the seats swapped
+        model_seat = game % 2
+        engines = [learned, reference] if model_seat == 0 else [reference, learned]
+        outcome, _, seconds = play_game(engines, seed + game // 2)
+        score += outcome if model_seat == 0 else 1 - outcome
+        thinking['model'] += seconds[model_seat]
+        thinking['reference'] += seconds[1 - model_seat]
+    print(f"model depth {depth} vs utility depth {reference_depth}: {score:.1f}/{games} "
+          f"thinking time {thinking['model']:.1f}s vs {thinking['reference']:.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train or evaluate the learned leaf evaluator")
+    parser.add_argument("command", choices=["train", "match"])
+    parser.add_argument("--model", default=DEFAULT_MODEL_PATH)
+    parser.add_argument("--games", type=int, default=None)
+    parser.add_argument("--kind", choices=["linear", "mlp"], default="linear")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--depth", type=int, default=None, help="self-play depth / model search depth")
+    parser.add_argument("--reference-depth", type=int, default=5)
+    args = parser.parse_args()
+    if args.command == "train":
+        train(args.model, args.games or 300, args.depth or 2, kind=args.kind, workers=args.workers)
+    else:
+        match(args.model, args.depth or 3, args.reference_depth, args.games or 20)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,305 @@
+"""
+NumPy playout engine: K games advanced in lockstep.
+
+Building Node objects costs a deep copy per ply, which caps Python playouts
+at a few games per second. Here each game is a row of arrays - positions,
+balances, jail state and a K x 40 ownership matrix - and every turn of all
+K games is a handful of array operations: roll the dice, apply the landing
+effects, then let the mover decide (rent is mandatory and doubles on a
+whole color group, income tax is paid the cheaper way, properties are bought
+while the balance stays above a reserve). Landing effects are tabulated from roll_outcome, so the rules are
+those of Node.get_children; verify() replays games through Node to check it.
+
+    playout = VectorPlayout(10_000, seed=0)
+    playout.run()
+    playout.winner          # 0, 1 or -1 for games still going at max_turns
+
+Measure throughput and check the rules against Node with:
+    python vector_playout.py --games 10000
+    python vector_playout.py --verify 200
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from node import DICE_OUTCOMES, PURCHASABLE_POSITIONS, roll_outcome
+from player import Player
+from property import COLOR_GROUPS, GROUP_OF, PROPERTY_DEFINITIONS
+
+# Turns (a roll and a decision each) after which a game counts as a draw;
+# the same 1000 plies as tournament.MAX_PLIES
+MAX_TURNS = 500
+# The simple policy buys a property only if this much cash is left afterwards
+BUY_RESERVE = 200
+
+NO_OWNER = -1
+INCOME_TAX = 4
+JAIL_FINE = 50
+
+_VALUES = np.zeros(40)
+for _position, _, _value in PROPERTY_DEFINITIONS:
+    _VALUES[_position] = _value
+_RENTS = _VALUES * 0.1
+_PURCHASABLE = np.zeros(40, dtype=bool)
+_PURCHASABLE[PURCHASABLE_POSITIONS] = True
+# The streets of each square's color group, padded with the square itself
+# (squares outside a group list only themselves)
+_GROUP_SIZE = max(len(positions) for _, positions in COLOR_GROUPS.values())
+_GROUP_MEMBERS = np.array([
+    ((COLOR_GROUPS[GROUP_OF[position]][1] if position in GROUP_OF else ()) + (position,) * _GROUP_SIZE)[:_GROUP_SIZE]
+    for position in range(40)])
+_STREET = np.zeros(40, dtype=bool)
+_STREET[list(GROUP_OF)] = True
+
+_ROLLS = [roll for roll, _ in DICE_OUTCOMES]
+_DOUBLES = np.array([doubles for (_, doubles), _ in DICE_OUTCOMES])
+_ROLL_PROBABILITIES = np.array([probability for _, probability in DICE_OUTCOMES])
+
+
+def _landing_tables():
+    """roll_outcome for a player out of jail (or leaving it on doubles), as
+    (40 x rolls) arrays: new position, balance change, opponent balance
+    change, sent to jail"""
+    shape = (40, len(DICE_OUTCOMES))
+    position = np.zeros(shape, dtype=np.int64)
+    balance_change = np.zeros(shape)
+    opponent_change = np.zeros(shape)
+    jailed = np.zeros(shape, dtype=bool)
+    for start in range(40):
+        player = Player(0, position=start)
+        for index, (roll, _) in enumerate(DICE_OUTCOMES):
+            outcome = roll_outcome(player, roll)
+            position[start, index], balance_change[start, index], opponent_change[start, index], \
+                jailed[start, index], _ = outcome
+    return position, balance_change, opponent_change, jailed
+
+
+_LAND_POSITION, _LAND_BALANCE, _LAND_OPPONENT, _LAND_JAILED = _landing_tables()
+
+
+class VectorPlayout:
+    """K games of two players; arrays are indexed [game] or [game, player ID]"""
+
+    def __init__(self, games, seed=None, buy_reserve=BUY_RESERVE, max_turns=MAX_TURNS):
+        self.games = games
+        self.rng = np.random.default_rng(seed)
+        self.buy_reserve = buy_reserve
+        self.max_turns = max_turns
+        self.position = np.zeros((games, 2), dtype=np.int64)
+        self.balance = np.full((games, 2), 1500.0)
+        self.in_jail = np.zeros((games, 2), dtype=bool)
+        self.jail_turns = np.zeros((games, 2), dtype=np.int64)
+        self.owner = np.full((games, 40), NO_OWNER, dtype=np.int8)
+        # The player whose turn it is, and whether they still have to roll
+        self.mover = np.zeros(games, dtype=np.int64)
+        self.rolling = False
+        self.winner = np.full(games, NO_OWNER, dtype=np.int64)
+        self.done = np.zeros(games, dtype=bool)
+        self.turns = np.zeros(games, dtype=np.int64)
+        # Dice indices of every roll, kept only by verify()
+        self.roll_history = None
+
+    @classmethod
+    def from_node(cls, node, games, seed=None, **kwargs):
+        """`games` copies of the state at `node`, e.g. for a Monte Carlo estimate of its value"""
+        playout = cls(games, seed, **kwargs)
+        for player in (node.current_player, node.second_player):
+            playout.position[:, player.ID] = player.position
+            playout.balance[:, player.ID] = player.balance
+            playout.in_jail[:, player.ID] = player.in_jail
+            playout.jail_turns[:, player.ID] = player.jail_turns
+        for prop in node.properties:
+            if prop.owner is not None:
+                playout.owner[:, prop.position] = prop.owner
+        playout.mover[:] = node.current_player.ID
+        playout.rolling = node.node_type == "chance"
+        playout._settle(np.arange(games), playout.mover)
+        return playout
+
+    def _settle(self, live, current):
+        """Mark the games of `live` that winner() would end, `current` being the player to act"""
+        rows = live
+        other = 1 - current
+        current_balance = self.balance[rows, current]
+        other_balance = self.balance[rows, other]
+        current_wins = (current_balance > 2000) | (other_balance < 0)
+        other_wins = ~current_wins & ((current_balance < 0) | (other_balance > 2000))
+        self.winner[rows[current_wins]] = current[current_wins]
+        self.winner[rows[other_wins]] = other[other_wins]
+        self.done[rows[current_wins | other_wins]] = True
+
+    def _roll(self, live):
+        mover = self.mover[live]
+        opponent = 1 - mover
+        dice = self.rng.choice(len(_ROLLS), size=len(live), p=_ROLL_PROBABILITIES)
+        doubles = _DOUBLES[dice]
+        if self.roll_history is not None:
+            full = np.full(self.games, -1)
+            full[live] = dice
+            self.roll_history.append(full)
+        start = self.position[live, mover]
+        balance = self.balance[live, mover]
+        in_jail = self.in_jail[live, mover]
+        jail_turns = self.jail_turns[live, mover]
+
+        # In jail without doubles: no movement; the third turn pays the fine
+        # (if affordable) and leaves
+        stuck = in_jail & ~doubles
+        jail_turns_after = jail_turns + 1
+        released = stuck & (jail_turns_after >= 3)
+        balance_change = np.where(released & (balance >= JAIL_FINE), -JAIL_FINE, 0.0)
+        new_position = start.copy()
+        new_in_jail = stuck & ~released
+        new_jail_turns = np.where(stuck & ~released, jail_turns_after, 0)
+        opponent_change = np.zeros(len(live))
+
+        # Everyone else moves, including players rolling doubles in jail
+        free = ~stuck
+        moved_start, moved_dice = start[free], dice[free]
+        new_position[free] = _LAND_POSITION[moved_start, moved_dice]
+        balance_change[free] = _LAND_BALANCE[moved_start, moved_dice]
+        opponent_change[free] = _LAND_OPPONENT[moved_start, moved_dice]
+        jailed = np.zeros(len(live), dtype=bool)
+        jailed[free] = _LAND_JAILED[moved_start, moved_dice]
+        new_in_jail |= jailed
+        new_jail_turns[jailed] = 0
+
+        self.position[live, mover] = new_position
+        self.balance[live, mover] = balance + balance_change
+        self.balance[live, opponent] += opponent_change
+        self.in_jail[live, mover] = new_in_jail
+        self.jail_turns[live, mover] = new_jail_turns
+        self._settle(live, mover)
+
+    def _decide(self, live):
+        mover = self.mover[live]
+        opponent = 1 - mover
+        position = self.position[live, mover]
+        balance = self.balance[live, mover]
+
+        # Income tax: the 10% option never costs more than the flat $200
+        taxed = position == INCOME_TAX
+        net_worth = balance + np.where(self.owner[live] == mover[:, None], _VALUES, 0.0).sum(1)
+        balance = balance - np.where(taxed, np.minimum(200, np.trunc(net_worth * 0.1)), 0.0)
+
+        owner = self.owner[live, position]
+        purchasable = _PURCHASABLE[position]
+        # Rent on the opponent's property is mandatory, double if they own
+        # the whole color group (the policy never builds houses)
+        monopoly = _STREET[position] & (self.owner[live[:, None], _GROUP_MEMBERS[position]] ==
+                                        opponent[:, None]).all(1)
+        rent = np.where(purchasable & (owner == opponent), _RENTS[position] * np.where(monopoly, 2, 1), 0.0)
+        buys = (purchasable & (owner == NO_OWNER) & (balance >= _VALUES[position]) &
+                (balance - _VALUES[position] >= self.buy_reserve))
+        balance = balance - rent - np.where(buys, _VALUES[position], 0.0)
+        self.owner[live[buys], position[buys]] = mover[buys]
+
+        self.balance[live, mover] = balance
+        self.balance[live, opponent] += rent
+        self.turns[live] += 1
+        # The turn passes to the opponent, who rolls next
+        self.mover[live] = opponent
+        self._settle(live, opponent)
+        self.done[live[self.turns[live] >= self.max_turns]] = True
+
+    def step(self):
+        """Advance every unfinished game by one ply (a roll or a decision)"""
+        live = np.flatnonzero(~self.done)
+        if len(live):
+            if self.rolling:
+                self._roll(live)
+            else:
+                self._decide(live)
+        self.rolling = not self.rolling
+        return len(live)
+
+    def run(self):
+        while self.step():
+            pass
+        return self.winner
+
+
+def policy_action(node, buy_reserve=BUY_RESERVE):
+    """The action VectorPlayout's policy takes at decision node `node`"""
+    actions = list(node.legal_actions())
+    if "income_tax_percent" in actions:
+        return "income_tax_percent"
+    if "buy" in actions:
+        prop = node.get_property_at_position(node.current_player.position, node.properties)
+        if node.current_player.balance - prop.value >= buy_reserve:
+            return "buy"
+    if "pay_rent" in actions:
+        return "pay_rent"
+    return "nothing"
+
+
+def win_probability(node, games=1000, seed=None):
+    """Monte Carlo estimate of P(player 0 wins) from `node`, draws counting half"""
+    winners = VectorPlayout.from_node(node, games, seed).run()
+    return float(np.mean(np.where(winners == NO_OWNER, 0.5, winners == 0)))
+
+
+def verify(games=200, seed=0):
+    """Replay `games` playouts through Node.make_child with the same dice and policy;
+    returns the number of games whose final balances or winner differ"""
+    from node import winner
+    from opening_book import start_node
+
+    playout = VectorPlayout(games, seed)
+    playout.roll_history = []
+    playout.run()
+    history = np.array(playout.roll_history)
+    mismatches = 0
+    for game in range(games):
+        node = start_node()
+        rolls = iter(history[:, game])
+        turns = 0
+        while winner(node) is None and turns < playout.max_turns:
+            if node.node_type == "chance":
+                node.get_children()
+                node = node.child_for_roll(_ROLLS[next(rolls)]).detached()
+            else:
+                node = node.make_child(policy_action(node)).detached()
+                turns += 1
+        won = winner(node)
+        balances = {player.ID: player.balance for player in (node.current_player, node.second_player)}
+        if (NO_OWNER if won is None else won) != playout.winner[game] or \
+                not np.allclose([balances[0], balances[1]], playout.balance[game]):
+            mismatches += 1
+    return mismatches
+
+
+def benchmark(games=10_000, seed=0):
+    start = time.perf_counter()
+    playout = VectorPlayout(games, seed)
+    plies = 0
+    while True:
+        live = playout.step()
+        if not live:
+            break
+        plies += live
+    elapsed = time.perf_counter() - start
+    winners = playout.winner
+    print(f"{games} games in {elapsed:.2f}s: {games / elapsed:.0f} games/s, {plies / elapsed:.0f} plies/s")
+    print(f"player 0 won {np.mean(winners == 0):.1%}, player 1 {np.mean(winners == 1):.1%}, "
+          f"draws {np.mean(winners == NO_OWNER):.1%}; mean length {playout.turns.mean():.0f} turns")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vectorised lockstep playouts")
+    parser.add_argument("--games", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--verify", type=int, metavar="GAMES", default=None,
+                        help="replay GAMES playouts through Node and report mismatches")
+    args = parser.parse_args()
+    if args.verify:
+        mismatches = verify(args.verify, args.seed)
+        print(f"{mismatches} of {args.verify} games differ from Node.make_child")
+    else:
+        benchmark(args.games, args.seed)
+
+
+if __name__ == "__main__":
+    main()